@@ -0,0 +1,268 @@
+"""
+Нагрузочная проверка обработки нажатий кнопок сборов (capt/buttons.py, capt/actor.py).
+
+Запускает сотни одновременных нажатий кнопок (присоединиться, доп. список,
+покинуть) по нескольким сборам через apply_capt_command — тот же путь, что и
+обработчики кнопок: запись участника, обработчик команд сбора, ответ
+пользователю, сводка треда, перерисовка и сохранение. Обращения к Discord и
+базе данных заменены записью вызовов в памяти; ответы пользователю и задержки
+сети уступают управление другим нажатиям.
+
+После прогона проверяется:
+    - в списках нет повторов, основной список не переполнен, участник не
+      находится в обоих списках, списки упорядочены по рангу;
+    - каждое нажатие получило ровно один ответ, а сохранение запрошено для
+      каждого изменившего сбор нажатия;
+    - результаты и итоговые списки совпадают с последовательным применением
+      команд в порядке их поступления в обработчик (порядок отправки).
+
+Запуск из корня репозитория:
+    python -m benchmarks.capt_actor_stress [--capts 5] [--users 150] [--clicks 1500]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+# Ранговые роли должны быть заданы до импорта capt.ranks
+ROLE_ENV = {
+    'LEAD_ROLE': 1001,
+    'CALLER_ROLE': 1002,
+    'CAPTER_3_LVL': 1003,
+    'CAPTER_2_LVL': 1004,
+    'CAPTER_1_LVL': 1005,
+}
+for name, role_id in ROLE_ENV.items():
+    os.environ.setdefault(name, str(role_id))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capt import actor
+from capt.buttons import apply_capt_command
+from capt.repository import CaptRepository
+from capt.renderer import CaptRenderer
+from capt.thread_digest import ThreadDigest
+from capt.roster import Roster
+
+class FakeRole:
+    __slots__ = ('id',)
+
+    def __init__(self, role_id):
+        self.id = role_id
+
+class FakeMember:
+    """Участник сервера с ранговой ролью"""
+
+    def __init__(self, member_id, role_ids):
+        self.id = member_id
+        self.display_name = f"user{member_id}"
+        self.mention = f"<@{member_id}>"
+        self.roles = [FakeRole(role_id) for role_id in role_ids]
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+
+class FakeResponse:
+    """Ответ на взаимодействие: запоминает ответы и имитирует задержку сети"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.replies = []
+
+    async def send_message(self, content, ephemeral=False):
+        self.replies.append(content)
+        await asyncio.sleep(self.rng.random() * 0.002)
+
+class FakeInteraction:
+    def __init__(self, message_id, user, rng):
+        self.message = FakeMessage(message_id)
+        self.user = user
+        self.response = FakeResponse(rng)
+
+class RecordingActors(actor.CaptActors):
+    """Реестр обработчиков, запоминающий порядок отправки команд и их результаты"""
+
+    def __init__(self):
+        super().__init__()
+        # {ID сообщения: [(команда, участник, результат)]} в порядке отправки
+        self.submitted = {}
+
+    async def submit(self, message_id, capt_data, command, user):
+        entry = [command, user, None]
+        self.submitted.setdefault(str(message_id), []).append(entry)
+        entry[2] = await super().submit(message_id, capt_data, command, user)
+        return entry[2]
+
+class RecordingWriteBuffer:
+    """Буфер записи без базы данных: считает запросы на сохранение"""
+
+    def __init__(self):
+        self.saves = 0
+
+    def mark_dirty(self, message_id, capt_data):
+        self.saves += 1
+
+class BenchRepository(CaptRepository):
+    """Хранилище сборов без базы данных"""
+
+    def __init__(self):
+        self.write_buffer = RecordingWriteBuffer()
+        self._capts = {}
+
+class RecordingDigest:
+    def __init__(self):
+        self.events = 0
+
+    def add_event(self, interaction, capt_data, event, mention):
+        self.events += 1
+
+class RecordingRenderer:
+    def __init__(self):
+        self.renders = 0
+
+    def request_render(self, message, capt_data):
+        self.renders += 1
+
+def make_capt(index, slots):
+    return {
+        'name': f"Сбор {index}",
+        'slots': slots,
+        'participants': Roster(),
+        'extra_participants': Roster(),
+    }
+
+def check_invariants(capt_data):
+    """Возвращает список нарушений инвариантов сбора"""
+    errors = []
+    main_ids = [member.id for member in capt_data['participants']]
+    extra_ids = [member.id for member in capt_data['extra_participants']]
+
+    if len(main_ids) > capt_data['slots']:
+        errors.append(f"основной список переполнен: {len(main_ids)} > {capt_data['slots']}")
+    if len(set(main_ids)) != len(main_ids) or len(set(extra_ids)) != len(extra_ids):
+        errors.append("участник встречается в списке дважды")
+    if set(main_ids) & set(extra_ids):
+        errors.append(f"участники в обоих списках: {sorted(set(main_ids) & set(extra_ids))}")
+    for name in ('participants', 'extra_participants'):
+        ranks = [member.rank for member in capt_data[name]]
+        if ranks != sorted(ranks):
+            errors.append(f"список {name} не упорядочен по рангу")
+    return errors
+
+def snapshot(capt_data):
+    return (
+        [member.id for member in capt_data['participants']],
+        [member.id for member in capt_data['extra_participants']],
+    )
+
+async def click(message_id, command, member, rng, interactions):
+    """Имитирует нажатие кнопки: задержка сети, затем обработчик кнопки"""
+    await asyncio.sleep(rng.random() * 0.005)
+    interaction = FakeInteraction(message_id, member, rng)
+    interactions.append(interaction)
+    await apply_capt_command(interaction, command)
+
+async def run(args):
+    rng = random.Random(args.seed)
+    rank_roles = list(ROLE_ENV.values())
+    members = [
+        FakeMember(user_id, [rng.choice(rank_roles)] if rng.random() < 0.8 else [])
+        for user_id in range(1, args.users + 1)
+    ]
+
+    registry = RecordingActors()
+    repository = BenchRepository()
+    digest = RecordingDigest()
+    renderer = RecordingRenderer()
+
+    # Подменяем синглтоны на время прогона и восстанавливаем их после
+    singletons = (actor.CaptActors, CaptRepository, ThreadDigest, CaptRenderer)
+    previous = [cls._instance for cls in singletons]
+    for cls, instance in zip(singletons, (registry, repository, digest, renderer)):
+        cls._instance = instance
+    try:
+        return await _run(args, rng, members, registry, repository, digest, renderer)
+    finally:
+        for cls, instance in zip(singletons, previous):
+            cls._instance = instance
+
+async def _run(args, rng, members, registry, repository, digest, renderer):
+    """Прогон нажатий и проверка результатов (синглтоны уже подменены)"""
+    for index in range(args.capts):
+        repository.restore(str(index), make_capt(index, args.slots))
+
+    commands = list(actor.COMMANDS)
+    capt_ids = [str(index) for index in range(args.capts)]
+    interactions = []
+    clicks = [
+        click(int(rng.choice(capt_ids)), rng.choice(commands), rng.choice(members), rng, interactions)
+        for _ in range(args.clicks)
+    ]
+
+    started = time.perf_counter()
+    await asyncio.gather(*clicks)
+    elapsed = time.perf_counter() - started
+
+    errors = []
+    changed = 0
+    events = 0
+    for message_id, capt_data in repository.items():
+        errors += [f"сбор {message_id}: {error}" for error in check_invariants(capt_data)]
+
+        # Последовательное применение команд в порядке отправки на пустом сборе
+        replay = make_capt(message_id, args.slots)
+        mismatch = None
+        for position, (command, user, outcome) in enumerate(registry.submitted.get(message_id, [])):
+            expected = actor.COMMANDS[command](replay, user)
+            if mismatch is None and (outcome is None or outcome['reply'] != expected['reply']):
+                mismatch = f"результат команды {command} №{position} для {user.id}"
+            if outcome is not None:
+                changed += outcome['changed']
+                events += len(outcome['events'])
+        if mismatch:
+            errors.append(f"сбор {message_id}: {mismatch} не совпадает с последовательным применением")
+        if snapshot(replay) != snapshot(capt_data):
+            errors.append(f"сбор {message_id}: итоговые списки отличаются от последовательного применения")
+
+    submitted = sum(len(entries) for entries in registry.submitted.values())
+    unanswered = sum(1 for interaction in interactions if len(interaction.response.replies) != 1)
+    if submitted != args.clicks:
+        errors.append(f"в обработчики поступило {submitted} из {args.clicks} команд")
+    if unanswered:
+        errors.append(f"нажатий без единственного ответа: {unanswered}")
+    if repository.write_buffer.saves != changed:
+        errors.append(f"запросов на сохранение {repository.write_buffer.saves}, изменений {changed}")
+    if digest.events != events or renderer.renders != changed:
+        errors.append(f"событий сводки {digest.events} из {events}, перерисовок {renderer.renders} из {changed}")
+
+    print(f"Сборов: {args.capts}, пользователей: {args.users}, нажатий: {args.clicks}, изменений: {changed}")
+    print(f"Время прогона: {elapsed:.3f} с")
+    for message_id, capt_data in repository.items():
+        main_ids, extra_ids = snapshot(capt_data)
+        print(f"  сбор {message_id}: основной список {len(main_ids)}/{args.slots}, доп. список {len(extra_ids)}")
+
+    if errors:
+        print("Нарушения:")
+        for error in errors:
+            print(f"  {error}")
+        return 1
+
+    print("Инварианты соблюдены, результаты совпадают с последовательным применением в порядке отправки")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capts', type=int, default=5, help="Количество сборов")
+    parser.add_argument('--users', type=int, default=150, help="Количество пользователей")
+    parser.add_argument('--slots', type=int, default=20, help="Количество слотов в сборе")
+    parser.add_argument('--clicks', type=int, default=1500, help="Количество одновременных нажатий")
+    parser.add_argument('--seed', type=int, default=1, help="Начальное значение генератора случайных чисел")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == '__main__':
+    main()
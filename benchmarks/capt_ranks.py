@@ -0,0 +1,116 @@
+"""
+Микробенчмарк определения рангов участников сбора.
+
+Сравнивает стоимость одного нажатия кнопки сбора (сортировка основного и
+дополнительного списков, поиск участника с низшим и высшим рангом) для
+прежней реализации (линейный поиск по RANK_HIERARCHY) и RankResolver.
+
+Запуск из корня репозитория:
+    python -m benchmarks.capt_ranks [--participants 100] [--clicks 2000]
+"""
+import os
+import sys
+import random
+import argparse
+import timeit
+
+# Ранговые роли должны быть заданы до импорта capt.ranks
+ROLE_ENV = {
+    'LEAD_ROLE': 1001,
+    'CALLER_ROLE': 1002,
+    'CAPTER_3_LVL': 1003,
+    'CAPTER_2_LVL': 1004,
+    'CAPTER_1_LVL': 1005,
+}
+for name, role_id in ROLE_ENV.items():
+    os.environ.setdefault(name, str(role_id))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capt import ranks
+
+class FakeRole:
+    __slots__ = ('id',)
+
+    def __init__(self, role_id):
+        self.id = role_id
+
+class FakeMember:
+    """Участник с набором ролей, как discord.Member (roles строится при каждом обращении)"""
+
+    def __init__(self, member_id, role_ids):
+        self.id = member_id
+        self._role_ids = role_ids
+
+    @property
+    def roles(self):
+        return [FakeRole(role_id) for role_id in self._role_ids]
+
+def legacy_get_user_rank(user):
+    """Прежняя реализация get_user_rank"""
+    user_role_ids = [role.id for role in user.roles]
+    for rank_id, role_id in ranks.RANK_HIERARCHY:
+        if role_id != 0 and role_id in user_role_ids:
+            return rank_id
+    return ranks.RANK_HIERARCHY[-1][0]
+
+def make_roster(count, extra_roles, seed=42):
+    """Создает участников со случайными ранговыми и обычными ролями"""
+    rng = random.Random(seed)
+    rank_roles = list(ROLE_ENV.values())
+    members = []
+    for index in range(count):
+        role_ids = [rng.randint(2000, 9000) for _ in range(extra_roles)]
+        if rng.random() < 0.8:
+            role_ids.append(rng.choice(rank_roles))
+        rng.shuffle(role_ids)
+        members.append(FakeMember(index, role_ids))
+    return members
+
+def legacy_click(participants, extra):
+    sorted(participants, key=legacy_get_user_rank)
+    sorted(extra, key=legacy_get_user_rank)
+    max(participants, key=legacy_get_user_rank)
+    min(extra, key=legacy_get_user_rank)
+
+def resolver_click(participants, extra):
+    get_rank = ranks.RankResolver.get_instance().get_rank
+    sorted(participants, key=get_rank)
+    sorted(extra, key=get_rank)
+    max(participants, key=get_rank)
+    min(extra, key=get_rank)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=100, help="Размер основного списка")
+    parser.add_argument('--extra', type=int, default=20, help="Размер дополнительного списка")
+    parser.add_argument('--roles', type=int, default=15, help="Количество неранговых ролей у участника")
+    parser.add_argument('--clicks', type=int, default=2000, help="Количество нажатий на замер")
+    args = parser.parse_args()
+
+    members = make_roster(args.participants + args.extra, args.roles)
+    participants, extra = members[:args.participants], members[args.participants:]
+
+    resolver = ranks.RankResolver.get_instance()
+    mismatches = [m.id for m in members if legacy_get_user_rank(m) != resolver.get_rank(m)]
+    if mismatches:
+        sys.exit(f"Ранги не совпадают для участников: {mismatches[:10]}")
+
+    def cold_click():
+        resolver.clear()
+        resolver_click(participants, extra)
+
+    results = {
+        "прежняя реализация": timeit.timeit(lambda: legacy_click(participants, extra), number=args.clicks),
+        "RankResolver, пустой кэш": timeit.timeit(cold_click, number=args.clicks),
+        "RankResolver, кэш заполнен": timeit.timeit(lambda: resolver_click(participants, extra), number=args.clicks),
+    }
+
+    baseline = results["прежняя реализация"]
+    print(f"Участников: {args.participants} + {args.extra} в доп. списке, ролей у участника: до {args.roles + 1}")
+    for name, total in results.items():
+        per_click = total / args.clicks * 1e6
+        print(f"{name:<28} {per_click:9.1f} мкс/нажатие  (x{baseline / total:.1f})")
+
+if __name__ == '__main__':
+    main()
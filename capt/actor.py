@@ -0,0 +1,185 @@
+import asyncio
+
+from tools.logger import Logger
+
+logger = Logger.get_instance()
+
+def _outcome(reply, changed=False, events=()):
+    """
+    Результат применения команды к сбору
+
+    Args:
+        reply: Ответ пользователю (эфемерное сообщение)
+        changed: Изменились ли списки участников
+        events: События для сводки треда: [(тип события, участник)]
+    """
+    return {'reply': reply, 'changed': changed, 'events': list(events)}
+
+def apply_join(capt_data, user):
+    """Присоединение к основному списку (с вытеснением участника более низкого ранга)"""
+    participants = capt_data['participants']
+    extra_participants = capt_data['extra_participants']
+
+    if user.id in participants:
+        return _outcome("Вы уже находитесь в списке участников")
+
+    # Если пользователь в доп. списке, удаляем его оттуда перед добавлением в основной
+    was_moved_from_extra = extra_participants.remove(user.id) is not None
+
+    # Если список еще не заполнен, добавляем пользователя
+    if len(participants) < capt_data['slots']:
+        participants.add(user)
+        if was_moved_from_extra:
+            return _outcome("Вы были перемещены из дополнительного списка в основной список", True, [('moved_to_main', user)])
+        return _outcome(f"Вы добавлены в список участников сбора '{capt_data['name']}'", True, [('joined', user)])
+
+    # Список заполнен, проверяем возможность замены участника с самым низким рангом
+    lowest_rank_user = participants.lowest()
+    if user.rank < participants.rank_of(lowest_rank_user.id):
+        participants.remove(lowest_rank_user.id)
+        extra_participants.add(lowest_rank_user)
+        participants.add(user)
+        return _outcome(
+            "Вы добавлены в основной список, участник с более низким рангом перемещен в дополнительный список",
+            True,
+            [('joined', user), ('moved_to_extra', lowest_rank_user)]
+        )
+
+    # Ранг не выше минимального: добавляем в дополнительный список
+    extra_participants.add(user)
+    return _outcome(f"Вы добавлены в дополнительный список сбора '{capt_data['name']}'", True, [('joined_extra', user)])
+
+def apply_join_extra(capt_data, user):
+    """Присоединение к дополнительному списку (с выходом из основного)"""
+    if user.id in capt_data['extra_participants']:
+        return _outcome("Вы уже находитесь в дополнительном списке")
+
+    was_in_main_list = capt_data['participants'].remove(user.id) is not None
+    capt_data['extra_participants'].add(user)
+
+    if was_in_main_list:
+        return _outcome("Вы были перемещены из основного списка в дополнительный список", True, [('moved_to_extra', user)])
+    return _outcome(f"Вы добавлены в дополнительный список сбора '{capt_data['name']}'", True, [('joined_extra', user)])
+
+def apply_leave(capt_data, user):
+    """Выход из основного или дополнительного списка"""
+    if capt_data['participants'].remove(user.id) is not None:
+        return _outcome("Вы покинули основной список сбора.", True, [('left', user)])
+
+    if capt_data['extra_participants'].remove(user.id) is not None:
+        return _outcome("Вы покинули дополнительный список сбора.", True, [('left_extra', user)])
+
+    return _outcome("Вы не найдены в списках участников.")
+
+# Команды сбора: имя → функция перехода состояния
+COMMANDS = {
+    'join': apply_join,
+    'join_extra': apply_join_extra,
+    'leave': apply_leave,
+}
+
+class CaptActor:
+    """
+    Последовательная обработка команд одного сбора.
+    Команды ставятся в очередь и применяются единственным обработчиком строго
+    по одной, поэтому каждое нажатие видит результат всех предыдущих. Обработчик
+    запускается при появлении команд и завершается, когда очередь пуста.
+    """
+
+    def __init__(self, message_id, capt_data):
+        self.message_id = str(message_id)
+        self.capt_data = capt_data
+        self.closed = False
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    async def submit(self, command, user):
+        """
+        Ставит команду в очередь сбора и дожидается ее применения
+
+        Args:
+            command: Имя команды (ключ COMMANDS)
+            user: Запись участника, нажавшего кнопку (ParticipantRecord)
+
+        Returns:
+            Результат команды (см. _outcome)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((command, user, future))
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        return await future
+
+    async def _run(self):
+        """Применяет команды из очереди по одной"""
+        while not self._queue.empty():
+            command, user, future = self._queue.get_nowait()
+            if future.done():
+                continue
+
+            try:
+                if self.closed:
+                    future.set_result(_outcome("Сбор уже закрыт"))
+                else:
+                    future.set_result(COMMANDS[command](self.capt_data, user))
+            except Exception as e:
+                logger.error(f"Ошибка при применении команды '{command}' к сбору {self.message_id}: {e}", exc_info=True)
+                future.set_exception(e)
+
+            # Отдаем управление, чтобы ожидающие обработчики кнопок получили результат
+            await asyncio.sleep(0)
+
+    def close(self):
+        """Закрывает сбор: команды, оставшиеся в очереди, получат отказ"""
+        self.closed = True
+
+class CaptActors:
+    """Реестр обработчиков команд сборов (по одному на сбор)"""
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = CaptActors()
+        return cls._instance
+
+    def __init__(self):
+        # Обработчики сборов: {message_id: CaptActor}
+        self._actors = {}
+        # Закрытые сборы, еще не удаленные из хранилища (нажатия на их кнопки
+        # больше не применяются); ID удаляется вместе со сбором (см. forget)
+        self._closed = set()
+
+    def get(self, message_id, capt_data):
+        """Возвращает обработчик сбора, создавая его при первом обращении"""
+        message_id = str(message_id)
+        actor = self._actors.get(message_id)
+        if actor is None or actor.capt_data is not capt_data:
+            actor = CaptActor(message_id, capt_data)
+            actor.closed = message_id in self._closed
+            self._actors[message_id] = actor
+        return actor
+
+    async def submit(self, message_id, capt_data, command, user):
+        """Применяет команду к сбору через его обработчик"""
+        return await self.get(message_id, capt_data).submit(command, user)
+
+    def close(self, message_id):
+        """Закрывает обработчик сбора и удаляет его из реестра"""
+        message_id = str(message_id)
+        self._closed.add(message_id)
+        actor = self._actors.pop(message_id, None)
+        if actor:
+            actor.close()
+
+    def forget(self, message_id):
+        """
+        Закрывает обработчик удаленного сбора и забывает о нем. Вызывается, когда
+        сбор удален из хранилища: новые нажатия до обработчика уже не доходят.
+        """
+        self.close(message_id)
+        self._closed.discard(str(message_id))
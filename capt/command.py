@@ -8,9 +8,13 @@ from tools.logger import Logger
 from tools.embed import EmbedBuilder
 from capt.view import CaptView
 from database.capt import get_instance as get_capt_db
-from capt.ranks import RAVE_ROLE_ID, can_manage_capt, sort_participants_by_rank
+from database.async_db import AsyncDatabase
+from capt.ranks import RAVE_ROLE_ID, NO_ROLE_RANK, can_manage_capt
+from capt.roster import Roster
+from capt.participant import ParticipantRecord
 from tools.message_sender import MessageSender
 from capt.scheduler import CaptScheduler
+from capt.repository import CaptRepository
 
 logger = Logger.get_instance()
 
@@ -20,10 +24,11 @@ class CaptCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.capt_db = get_capt_db()
-        # Словарь для хранения данных сборов в памяти (ключ - ID сообщения)
-        self.active_capts = {}
+        self.async_db = AsyncDatabase.get_instance()
+        # Единственное хранилище активных сборов в памяти
+        self.repository = CaptRepository.get_instance()
         # Создаем планировщик для автоматического закрытия просроченных сборов
-        self.scheduler = CaptScheduler(bot, self.capt_db)
+        self.scheduler = CaptScheduler(bot)
         
     def cog_unload(self):
         # Останавливаем фоновую задачу в планировщике
@@ -96,11 +101,11 @@ class CaptCommand(commands.Cog):
             # Создаем данные для сбора
             capt_data = {
                 'name': name,
-                'creator': interaction.user,
+                'creator': ParticipantRecord.from_member(interaction.user),
                 'datetime': date_time,
                 'slots': slots,
-                'participants': [],
-                'extra_participants': [],
+                'participants': Roster(),
+                'extra_participants': Roster(),
                 'guild_id': interaction.guild.id,
                 'channel_id': interaction.channel.id
             }
@@ -109,7 +114,7 @@ class CaptCommand(commands.Cog):
             embed = EmbedBuilder.create_capt_embed(capt_data)
             
             # Создаем view с упрощенными ID кнопок (будут обновлены после отправки)
-            view = CaptView(capt_data)
+            view = CaptView()
             
             # Создаем строку для пинга роли Rave, если она настроена
             content = None
@@ -136,14 +141,9 @@ class CaptCommand(commands.Cog):
             # Добавляем thread_id в данные капта
             capt_data['thread_id'] = thread.id
             
-            # Сохраняем данные сбора в словаре для быстрого доступа в памяти
-            self.active_capts[message_id] = capt_data
-            
-            # Сохраняем данные в базу данных
-            self.capt_db.save_capt(message_id, capt_data)
-            
-            # Обновляем данные в планировщике
-            self.scheduler.set_active_capts(self.active_capts)
+            # Добавляем сбор в хранилище (с сохранением в базу данных) и планируем его закрытие
+            await self.repository.add(message_id, capt_data)
+            self.scheduler.schedule(message_id, capt_data)
             
             logger.info(f"Пользователь {interaction.user.name} создал сбор '{name}' на {date_time} с {slots} слотами. ID сообщения: {message_id}")
             
@@ -155,10 +155,10 @@ class CaptCommand(commands.Cog):
         """Восстанавливает работу кнопок в существующих сборах при запуске бота"""
         try:
             # Чистим старые сборы (старше 7 дней)
-            self.capt_db.clean_old_capts(7)
+            await self.async_db.write(self.capt_db.clean_old_capts, 7)
             
             # Загружаем данные из базы данных
-            saved_capts = self.capt_db.get_all_capts()
+            saved_capts = await self.async_db.read(self.capt_db.get_all_capts)
             if not saved_capts:
                 logger.info("Нет сохраненных сборов для восстановления")
                 return
@@ -178,20 +178,12 @@ class CaptCommand(commands.Cog):
                         logger.warning(f"Канал {capt_info['channel_id']} не найден для сбора {capt_info['name']}")
                         continue
                     
-                    # Пытаемся получить сообщение
-                    try:
-                        message = await channel.fetch_message(int(message_id))
-                    except discord.NotFound:
-                        logger.warning(f"Сообщение {message_id} не найдено для сбора {capt_info['name']}")
-                        # Удаляем сбор из базы, так как сообщение больше не существует
-                        self.capt_db.delete_capt(message_id)
-                        continue
+                    # Сообщение сбора не запрашиваем: если оно было удалено, сбор будет
+                    # удален из базы при первом изменении сообщения (закрытии по времени)
                     
-                    # Находим создателя
-                    creator = guild.get_member(int(capt_info["creator"]["id"]))
-                    if not creator:
-                        # Если создатель не найден, используем бота
-                        creator = self.bot.user
+                    # Создатель и участники восстанавливаются из сохраненных записей
+                    # без обращения к кэшу участников сервера
+                    creator = ParticipantRecord(capt_info["creator"]["id"], NO_ROLE_RANK, capt_info["creator"]["name"])
                     
                     # Восстанавливаем данные сбора
                     capt_data = {
@@ -199,8 +191,8 @@ class CaptCommand(commands.Cog):
                         'creator': creator,
                         'datetime': capt_info["datetime"],
                         'slots': capt_info["slots"],
-                        'participants': [],
-                        'extra_participants': [],
+                        'participants': Roster(),
+                        'extra_participants': Roster(),
                         'guild_id': capt_info["guild_id"],
                         'channel_id': capt_info["channel_id"]
                     }
@@ -211,61 +203,33 @@ class CaptCommand(commands.Cog):
                     
                     # Восстанавливаем списки участников
                     for participant_info in capt_info["participants"]:
-                        user = guild.get_member(int(participant_info["id"]))
-                        if user:
-                            capt_data['participants'].append(user)
+                        capt_data['participants'].add(ParticipantRecord.from_info(participant_info, guild))
                     
                     for participant_info in capt_info["extra_participants"]:
-                        user = guild.get_member(int(participant_info["id"]))
-                        if user:
-                            capt_data['extra_participants'].append(user)
+                        capt_data['extra_participants'].add(ParticipantRecord.from_info(participant_info, guild))
                     
                     # Создаем новое представление с восстановленными данными
-                    view = CaptView(capt_data)
+                    view = CaptView()
                     view.update_button_ids(message_id)
                     
                     # Регистрируем представление
                     self.bot.add_view(view)
                     
-                    # Сохраняем в нашем словаре
-                    self.active_capts[message_id] = capt_data
-                    
-                    # Обновляем данные в планировщике
-                    self.scheduler.set_active_capts(self.active_capts)
+                    # Добавляем сбор в хранилище и планируем его закрытие
+                    self.repository.restore(message_id, capt_data)
+                    self.scheduler.schedule(message_id, capt_data)
                     
                     logger.info(f"Восстановлен сбор '{capt_info['name']}' в канале {channel.name}")
                 
                 except Exception as capt_error:
                     logger.error(f"Ошибка при восстановлении сбора с ID {message_id}: {capt_error}", exc_info=True)
             
-            logger.info(f"Восстановление сборов завершено. Активно {len(self.active_capts)} сборов.")
+            logger.info(f"Восстановление сборов завершено. Активно {len(self.repository)} сборов.")
         
         except Exception as e:
             logger.error(f"Ошибка при синхронизации сборов: {e}", exc_info=True)
-    
-    # Метод для обновления данных сбора
-    def update_capt_data(self, message_id, capt_data):
-        """Обновляет данные сбора и сохраняет в базе"""
-        if message_id in self.active_capts:
-            self.active_capts[message_id] = capt_data
-            self.capt_db.save_capt(message_id, capt_data)
-            # Обновляем данные в планировщике
-            self.scheduler.set_active_capts(self.active_capts)
-    
-    # Метод для удаления сбора
-    def remove_capt(self, message_id):
-        """Удаляет сбор из активных сборов"""
-        if message_id in self.active_capts:
-            del self.active_capts[message_id]
-            self.capt_db.delete_capt(message_id)
-            # Обновляем данные в планировщике
-            self.scheduler.set_active_capts(self.active_capts)
-            logger.info(f"Сбор с ID {message_id} удален из активных")
 
 async def setup(bot):
     cog = CaptCommand(bot)
     await bot.add_cog(cog)
-    # Запускаем синхронизацию существующих сборов
-    await cog.sync_views()
-    # Обновляем данные в планировщике
-    cog.scheduler.set_active_capts(cog.active_capts) 
\ No newline at end of file
+    # Восстановление существующих сборов выполняется после подключения (см. tools/boot.py)
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from capt.ranks import RankResolver, NO_ROLE_RANK
+
+# Формат времени присоединения в базе данных (UTC, как CURRENT_TIMESTAMP)
+JOINED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class ParticipantRecord:
+    """
+    Компактная запись участника сбора вместо объекта discord.Member.
+    Хранит только ID пользователя, ранг на момент присоединения, отображаемое
+    имя и время присоединения; упоминание строится по ID, а объект участника
+    запрашивается у гильдии только при необходимости (см. resolve).
+    """
+
+    __slots__ = ('user_id', 'rank', 'display_name', 'joined_at')
+
+    def __init__(self, user_id, rank, display_name, joined_at=None):
+        """
+        Args:
+            user_id: ID пользователя Discord
+            rank: Ранг участника (1 - высший, 6 - низший)
+            display_name: Отображаемое имя
+            joined_at: Время присоединения (UTC) или None, если неизвестно
+        """
+        self.user_id = int(user_id)
+        self.rank = rank
+        self.display_name = display_name
+        self.joined_at = joined_at
+
+    @classmethod
+    def from_member(cls, member):
+        """Создает запись для участника сервера, присоединившегося сейчас"""
+        return cls(
+            member.id,
+            RankResolver.get_instance().get_rank(member),
+            member.display_name,
+            datetime.now(timezone.utc).replace(microsecond=0)
+        )
+
+    @classmethod
+    def from_info(cls, info, guild=None):
+        """
+        Создает запись из сохраненных в базе данных сведений об участнике
+
+        Args:
+            info: Словарь с id, name, rank и joined_at (см. CaptDatabase.get_capt)
+            guild: Гильдия для определения ранга записей, сохраненных без ранга
+        """
+        rank = info.get('rank')
+        if rank is None:
+            # Записи, сохраненные до появления ранга: определяем его, если участник есть в кэше
+            member = guild.get_member(int(info['id'])) if guild else None
+            rank = RankResolver.get_instance().get_rank(member) if member else NO_ROLE_RANK
+
+        joined_at = info.get('joined_at')
+        if joined_at:
+            joined_at = datetime.strptime(joined_at, JOINED_AT_FORMAT).replace(tzinfo=timezone.utc)
+
+        return cls(info['id'], rank, info['name'], joined_at or None)
+
+    @property
+    def id(self):
+        """ID пользователя (совместимо с discord.Member.id)"""
+        return self.user_id
+
+    @property
+    def mention(self):
+        """Упоминание пользователя"""
+        return f"<@{self.user_id}>"
+
+    @property
+    def joined_at_text(self):
+        """Время присоединения в формате базы данных или None"""
+        return self.joined_at.strftime(JOINED_AT_FORMAT) if self.joined_at else None
+
+    def resolve(self, guild):
+        """Возвращает объект участника из кэша гильдии или None"""
+        return guild.get_member(self.user_id)
+
+    def __repr__(self):
+        return f"ParticipantRecord(user_id={self.user_id}, rank={self.rank}, display_name={self.display_name!r})"
@@ -38,6 +38,65 @@ RANK_NAMES = {
     6: "Нет роли"
 }
 
+# Ранг для пользователей без ролей из иерархии
+NO_ROLE_RANK = RANK_HIERARCHY[-1][0]
+
+# Предвычисленное соответствие ID роли → ранг
+ROLE_RANKS = {role_id: rank_id for rank_id, role_id in RANK_HIERARCHY if role_id != 0}
+
+class RankResolver:
+    """
+    Определение рангов участников с кэшированием.
+    Ранг вычисляется по предвычисленному словарю ROLE_RANKS один раз на
+    участника и хранится до изменения его ролей (см. invalidate в on_member_update).
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = RankResolver()
+        return cls._instance
+
+    def __init__(self, role_ranks=None):
+        """
+        Инициализация
+
+        Args:
+            role_ranks: Словарь {ID роли: ранг} (по умолчанию ROLE_RANKS)
+        """
+        self.role_ranks = ROLE_RANKS if role_ranks is None else role_ranks
+        # Кэш рангов: {ID участника: ранг}
+        self._cache = {}
+
+    def compute_rank(self, user):
+        """Вычисляет ранг пользователя по его ролям без использования кэша"""
+        role_ranks = self.role_ranks
+        rank = NO_ROLE_RANK
+        for role in user.roles:
+            role_rank = role_ranks.get(role.id)
+            if role_rank is not None and role_rank < rank:
+                rank = role_rank
+        return rank
+
+    def get_rank(self, user):
+        """Возвращает ранг пользователя (из кэша, если он уже вычислялся)"""
+        rank = self._cache.get(user.id)
+        if rank is None:
+            rank = self.compute_rank(user)
+            self._cache[user.id] = rank
+        return rank
+
+    def invalidate(self, user_id):
+        """Сбрасывает кэшированный ранг пользователя (например, при изменении ролей)"""
+        self._cache.pop(user_id, None)
+
+    def clear(self):
+        """Сбрасывает кэш рангов всех пользователей"""
+        self._cache.clear()
+
 def get_user_rank(user):
     """
     Определяет ранг пользователя на основе его ролей
@@ -48,16 +107,7 @@ def get_user_rank(user):
     Returns:
         int: ID ранга пользователя (1 - высший, 6 - низший)
     """
-    # Получаем ID ролей пользователя
-    user_role_ids = [role.id for role in user.roles]
-    
-    # Определяем ранг пользователя (выбираем первый подходящий из иерархии)
-    for rank_id, role_id in RANK_HIERARCHY:
-        if role_id != 0 and role_id in user_role_ids:
-            return rank_id
-    
-    # Если ни одна роль не подошла, возвращаем самый низкий ранг
-    return RANK_HIERARCHY[-1][0]  # Ранг 6 - "Нет роли"
+    return RankResolver.get_instance().get_rank(user)
 
 def get_user_rank_name(user):
     """
@@ -93,38 +143,3 @@ def can_manage_capt(user):
             return True
             
     return False
-
-def get_lowest_rank_user(participants):
-    """Находит участника с самым низким рангом"""
-    if not participants:
-        return None
-        
-    # Находим участника с самым высоким значением ранга (самый низкий ранг)
-    return max(participants, key=lambda participant: get_user_rank(participant))
-
-def get_highest_rank_from_extra(extra_participants, exclude_user_id=None):
-    """
-    Находит участника с самым высоким рангом из дополнительного списка
-    
-    Args:
-        extra_participants: Список дополнительных участников
-        exclude_user_id: ID пользователя, которого нужно исключить из поиска
-        
-    Returns:
-        Пользователь с самым высоким рангом или None, если список пуст
-    """
-    if not extra_participants:
-        return None
-        
-    # Фильтруем список, исключая указанного пользователя
-    filtered_participants = [p for p in extra_participants if exclude_user_id is None or p.id != exclude_user_id]
-    
-    if not filtered_participants:
-        return None
-        
-    # Возвращаем участника с самым низким числовым значением ранга (самый высокий ранг)
-    return min(filtered_participants, key=lambda participant: get_user_rank(participant))
-
-def sort_participants_by_rank(participants):
-    """Сортирует участников по рангу (от высшего к низшему)"""
-    return sorted(participants, key=lambda participant: get_user_rank(participant)) 
\ No newline at end of file
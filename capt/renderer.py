@@ -0,0 +1,94 @@
+import os
+import asyncio
+
+from tools.logger import Logger
+from tools.embed import EmbedBuilder
+
+logger = Logger.get_instance()
+
+class CaptRenderer:
+    """
+    Объединение перерисовок эмбедов сборов.
+    Первое изменение сбора публикуется сразу, а изменения, пришедшие в течение
+    интервала CAPT_RENDER_INTERVAL, объединяются в одно редактирование сообщения
+    с последним состоянием. Эмбед, совпадающий с уже опубликованным, не отправляется.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = CaptRenderer()
+        return cls._instance
+
+    def __init__(self, interval=None):
+        """
+        Инициализация
+
+        Args:
+            interval: Минимальный интервал между редактированиями одного сбора в секундах
+                      (по умолчанию из CAPT_RENDER_INTERVAL или 1)
+        """
+        if interval is None:
+            interval = float(os.getenv('CAPT_RENDER_INTERVAL', 1))
+
+        self.interval = interval
+        # Ожидающие перерисовки: {message_id: (сообщение, данные сбора)}
+        self._pending = {}
+        # Активные задачи перерисовки по сборам
+        self._tasks = {}
+        # Последний опубликованный эмбед каждого сбора (в виде словаря)
+        self._published = {}
+
+    def request_render(self, message, capt_data):
+        """
+        Запрашивает перерисовку эмбеда сбора
+
+        Args:
+            message: Сообщение сбора
+            capt_data: Данные сбора
+        """
+        message_id = str(message.id)
+        self._pending[message_id] = (message, capt_data)
+
+        task = self._tasks.get(message_id)
+        if task is None or task.done():
+            self._tasks[message_id] = asyncio.create_task(self._render_loop(message_id))
+
+    def forget(self, message_id):
+        """Забывает состояние сбора (например, после его закрытия)"""
+        message_id = str(message_id)
+        self._pending.pop(message_id, None)
+        self._published.pop(message_id, None)
+
+        task = self._tasks.pop(message_id, None)
+        if task:
+            task.cancel()
+
+    async def _render_loop(self, message_id):
+        """Публикует последнее состояние сбора не чаще одного раза за интервал"""
+        try:
+            while message_id in self._pending:
+                message, capt_data = self._pending.pop(message_id)
+                await self._publish(message_id, message, capt_data)
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при перерисовке сбора {message_id}: {e}", exc_info=True)
+        finally:
+            if self._tasks.get(message_id) is asyncio.current_task():
+                del self._tasks[message_id]
+
+    async def _publish(self, message_id, message, capt_data):
+        """Редактирует сообщение сбора, если эмбед изменился"""
+        embed = EmbedBuilder.create_capt_embed(capt_data)
+        rendered = embed.to_dict()
+
+        if self._published.get(message_id) == rendered:
+            return
+
+        await message.edit(embed=embed)
+        self._published[message_id] = rendered
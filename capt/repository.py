@@ -0,0 +1,97 @@
+from tools.logger import Logger
+from database.capt import get_instance as get_capt_db, snapshot_capt_data
+from database.async_db import AsyncDatabase
+from capt.write_buffer import CaptWriteBuffer
+from capt.renderer import CaptRenderer
+from capt.actor import CaptActors
+
+logger = Logger.get_instance()
+
+class CaptRepository:
+    """
+    Единственное хранилище активных сборов в памяти (ключ — ID сообщения).
+    Кнопки, команда и планировщик получают данные сбора только отсюда, а все
+    изменения сохраняются в базу через этот же объект: создание и удаление
+    записываются сразу, изменения списков — через буфер отложенной записи.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = CaptRepository()
+        return cls._instance
+
+    def __init__(self):
+        self.capt_db = get_capt_db()
+        self.async_db = AsyncDatabase.get_instance()
+        self.write_buffer = CaptWriteBuffer.get_instance()
+        # Активные сборы: {ID сообщения: данные сбора}
+        self._capts = {}
+
+    def get(self, message_id):
+        """Возвращает данные активного сбора или None"""
+        return self._capts.get(str(message_id))
+
+    def __contains__(self, message_id):
+        return str(message_id) in self._capts
+
+    def __len__(self):
+        return len(self._capts)
+
+    def items(self):
+        """Пары (ID сообщения, данные сбора) всех активных сборов"""
+        return self._capts.items()
+
+    async def add(self, message_id, capt_data):
+        """
+        Добавляет новый сбор и сразу сохраняет его в базу данных
+
+        Returns:
+            True, если сбор сохранен в базе данных
+        """
+        message_id = str(message_id)
+        self._capts[message_id] = capt_data
+        saved = await self.async_db.write(self.capt_db.save_capt, message_id, snapshot_capt_data(capt_data))
+        return saved is not None
+
+    def restore(self, message_id, capt_data):
+        """Добавляет сбор, загруженный из базы данных (без повторного сохранения)"""
+        self._capts[str(message_id)] = capt_data
+
+    def save(self, message_id):
+        """
+        Сохраняет изменения сбора (через буфер отложенной записи)
+
+        Returns:
+            False, если сбор не найден среди активных
+        """
+        message_id = str(message_id)
+        capt_data = self._capts.get(message_id)
+        if capt_data is None:
+            return False
+
+        self.write_buffer.mark_dirty(message_id, capt_data)
+        return True
+
+    async def remove(self, message_id):
+        """
+        Удаляет сбор из памяти и из базы данных. Нажатия кнопок, пришедшие
+        позже, не применяются, а несохраненные изменения отбрасываются.
+
+        Returns:
+            Данные удаленного сбора или None, если он не был активен
+        """
+        message_id = str(message_id)
+        capt_data = self._capts.pop(message_id, None)
+
+        CaptActors.get_instance().forget(message_id)
+        self.write_buffer.discard(message_id)
+        CaptRenderer.get_instance().forget(message_id)
+        await self.async_db.write(self.capt_db.delete_capt, message_id)
+
+        if capt_data is not None:
+            logger.info(f"Сбор с ID {message_id} удален из активных")
+        return capt_data
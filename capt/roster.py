@@ -0,0 +1,93 @@
+import bisect
+import itertools
+
+# Общий счетчик порядка присоединения (упорядочивает участников одного ранга)
+_join_sequence = itertools.count()
+
+class Roster:
+    """
+    Список участников сбора (ParticipantRecord), упорядоченный по (ранг, порядок присоединения).
+    Позиция вставки и удаления находится двоичным поиском (O(log n)), но сама
+    вставка и удаление сдвигают элементы списка (O(n)); для списков сбора из
+    десятков участников это копирование нескольких сотен байт без сортировки.
+    Участник с высшим и низшим рангом доступен без перебора списка, проверка
+    участия — по ID пользователя через словарь. Ранг фиксируется при добавлении
+    участника в список.
+    """
+
+    __slots__ = ('_keys', '_members', '_entries')
+
+    def __init__(self, members=()):
+        """
+        Args:
+            members: Начальные записи участников (добавляются в порядке перечисления)
+        """
+        # Отсортированные ключи (ранг, порядок) и участники в том же порядке
+        self._keys = []
+        self._members = []
+        # {ID пользователя: ключ}
+        self._entries = {}
+
+        for member in members:
+            self.add(member)
+
+    def add(self, member):
+        """
+        Добавляет участника в список
+
+        Returns:
+            True, если участник добавлен, False, если он уже в списке
+        """
+        if member.id in self._entries:
+            return False
+
+        key = (member.rank, next(_join_sequence))
+        index = bisect.bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._members.insert(index, member)
+        self._entries[member.id] = key
+        return True
+
+    def remove(self, user_id):
+        """
+        Удаляет участника из списка по ID пользователя
+
+        Returns:
+            Удаленный участник или None, если его не было в списке
+        """
+        key = self._entries.pop(user_id, None)
+        if key is None:
+            return None
+
+        index = bisect.bisect_left(self._keys, key)
+        del self._keys[index]
+        return self._members.pop(index)
+
+    def highest(self):
+        """Участник с самым высоким рангом (присоединившийся раньше других) или None"""
+        return self._members[0] if self._members else None
+
+    def lowest(self):
+        """Участник с самым низким рангом (первый присоединившийся среди них) или None"""
+        if not self._members:
+            return None
+
+        index = bisect.bisect_left(self._keys, (self._keys[-1][0],))
+        return self._members[index]
+
+    def rank_of(self, user_id):
+        """Ранг участника в списке или None"""
+        key = self._entries.get(user_id)
+        return key[0] if key else None
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __repr__(self):
+        return f"Roster({[member.id for member in self._members]})"
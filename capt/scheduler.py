@@ -1,117 +1,173 @@
-import discord
-from discord.ext import tasks
+import heapq
+import asyncio
 from datetime import datetime as dt, timezone, timedelta
 
 from tools.logger import Logger
 from capt.view import CaptView
+from tools.message_ops import MessageOps
+from tools.dispatcher import Dispatcher
+from capt.thread_digest import ThreadDigest
+from capt.actor import CaptActors
+from capt.repository import CaptRepository
 
 logger = Logger.get_instance()
 
+# Время сборов указывается по Москве (UTC+3)
+MOSCOW_TZ = timezone(timedelta(hours=3))
+
+def parse_capt_deadline(datetime_str):
+    """
+    Преобразует дату и время сбора в формате DD.MM.YYYY HH:MM в момент времени по МСК
+
+    Raises:
+        ValueError: если строка не соответствует формату
+    """
+    return dt.strptime(datetime_str, "%d.%m.%Y %H:%M").replace(tzinfo=MOSCOW_TZ)
+
 class CaptScheduler:
-    """Планировщик для автоматического закрытия просроченных сборов"""
+    """
+    Планировщик для автоматического закрытия просроченных сборов.
+    Время окончания каждого сбора вычисляется один раз при создании или
+    восстановлении, а сборы хранятся в очереди по времени закрытия:
+    планировщик спит до ближайшего срока и закрывает сбор точно в срок.
+    """
     
-    def __init__(self, bot, capt_db):
+    def __init__(self, bot):
         self.bot = bot
-        self.capt_db = capt_db
-        self.active_capts = {}
+        self.repository = CaptRepository.get_instance()
         
-        # Запускаем фоновую задачу для проверки устаревших сборов
-        self.check_outdated_capts.start()
+        # Очередь закрытия: куча (время закрытия, ID сообщения)
+        self._deadlines = []
+        # Актуальные сроки сборов: {ID сообщения: (строка даты, время закрытия)}.
+        # Записи кучи, не совпадающие с этим словарем, считаются устаревшими
+        self._entries = {}
+        self._wakeup = asyncio.Event()
         
-    def set_active_capts(self, active_capts):
-        """Устанавливает словарь активных сборов из CaptCommand"""
-        self.active_capts = active_capts
+        # Запускаем фоновую задачу закрытия просроченных сборов
+        self._task = asyncio.create_task(self.run())
         
     def cog_unload(self):
         """Останавливаем фоновую задачу при выгрузке модуля"""
-        self.check_outdated_capts.cancel()
+        self._task.cancel()
+    
+    def schedule(self, message_id, capt_data):
+        """
+        Планирует закрытие сбора по его дате и времени.
+        Повторный вызов с той же датой не пересчитывает срок.
+
+        Args:
+            message_id: ID сообщения сбора
+            capt_data: Данные сбора
+        """
+        datetime_str = capt_data['datetime']
+        entry = self._entries.get(message_id)
+        if entry and entry[0] == datetime_str:
+            return
         
-    @tasks.loop(minutes=5)  # Проверяем каждые 5 минут
-    async def check_outdated_capts(self):
-        """Фоновая задача для проверки и закрытия сборов с истекшим временем"""
         try:
-            await self.close_outdated_capts()
-        except Exception as e:
-            logger.error(f"Ошибка при проверке устаревших сборов: {e}", exc_info=True)
-            
-    @check_outdated_capts.before_loop
-    async def before_check_outdated_capts(self):
-        """Ждем, пока бот полностью загрузится"""
-        await self.bot.wait_until_ready()
-            
-    async def close_outdated_capts(self):
-        """Закрывает все сборы, у которых истекло время"""
-        if not self.active_capts:
+            deadline = parse_capt_deadline(datetime_str)
+        except ValueError as e:
+            logger.error(f"Ошибка при разборе времени сбора {message_id}: {e}", exc_info=True)
             return
-            
-        # Текущее время в МСК
-        current_time = dt.now(timezone(timedelta(hours=3)))
-        capts_to_close = []
         
-        # Проверяем все активные сборы
-        for message_id, capt_data in self.active_capts.items():
-            try:
-                # Парсим дату и время сбора (предполагается, что время в МСК)
-                capt_time = dt.strptime(capt_data['datetime'], "%d.%m.%Y %H:%M")
-                # Добавляем информацию о часовом поясе (МСК = UTC+3)
-                moscow_tz = timezone(timedelta(hours=3))
-                capt_time = capt_time.replace(tzinfo=moscow_tz)
-                
-                # Если время сбора прошло, добавляем его в список для закрытия
-                if current_time > capt_time:
-                    capts_to_close.append((message_id, capt_data))
-            except Exception as e:
-                logger.error(f"Ошибка при проверке времени сбора {message_id}: {e}", exc_info=True)
+        self._entries[message_id] = (datetime_str, deadline)
+        heapq.heappush(self._deadlines, (deadline, message_id))
+        self._wakeup.set()
+    
+    def _pop_due(self, now):
+        """Забирает из очереди все сборы, срок которых наступил"""
+        due = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, message_id = heapq.heappop(self._deadlines)
+            entry = self._entries.get(message_id)
+            # Пропускаем устаревшие записи перенесенных сборов
+            if entry is None or entry[1] != deadline:
+                continue
+            del self._entries[message_id]
+            due.append(message_id)
+        return due
+    
+    async def run(self):
+        """Фоновая задача: ждет ближайшего срока и закрывает просроченные сборы"""
+        await self.bot.wait_until_ready()
         
-        # Закрываем просроченные сборы
-        for message_id, capt_data in capts_to_close:
+        while True:
             try:
-                # Получаем канал и сообщение
-                channel_id = capt_data['channel_id']
-                channel = self.bot.get_channel(int(channel_id))
+                self._wakeup.clear()
                 
-                if not channel:
-                    logger.warning(f"Канал {channel_id} не найден для сбора {capt_data['name']}")
-                    continue
-                    
-                try:
-                    message = await channel.fetch_message(int(message_id))
-                except discord.NotFound:
-                    logger.warning(f"Сообщение {message_id} не найдено для сбора {capt_data['name']}")
-                    self.capt_db.delete_capt(message_id)
-                    if message_id in self.active_capts:
-                        del self.active_capts[message_id]
+                if not self._deadlines:
+                    await self._wakeup.wait()
                     continue
                 
-                # Отправляем сообщение о закрытии в тред, если он существует
-                if 'thread_id' in capt_data and capt_data['thread_id']:
+                delay = (self._deadlines[0][0] - dt.now(MOSCOW_TZ)).total_seconds()
+                if delay > 0:
                     try:
-                        thread_id = capt_data['thread_id']
-                        thread = channel.get_thread(thread_id)
-                        if thread:
-                            await thread.send(f"**Сбор автоматически закрыт**, так как время сбора ({capt_data['datetime']}) уже прошло.")
-                    except Exception as thread_error:
-                        logger.error(f"Ошибка при отправке сообщения в тред для сбора {message_id}: {thread_error}", exc_info=True)
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
                 
-                # Получаем view из сообщения, если возможно
-                if message.components:
-                    # Создаем новое view с деактивированными кнопками
-                    view = CaptView(capt_data)
-                    view.update_button_ids(message_id)
-                    
-                    # Деактивируем все кнопки
-                    for child in view.children:
-                        child.disabled = True
-                    
-                    # Обновляем сообщение с деактивированными кнопками
-                    await message.edit(view=view)
+                for message_id in self._pop_due(dt.now(MOSCOW_TZ)):
+                    # Сборы, закрытые вручную, в хранилище уже отсутствуют
+                    capt_data = self.repository.get(message_id)
+                    if capt_data:
+                        await self.close_capt(message_id, capt_data)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка при проверке устаревших сборов: {e}", exc_info=True)
+    
+    async def close_capt(self, message_id, capt_data):
+        """Закрывает сбор, время которого истекло"""
+        try:
+            # Получаем канал
+            channel_id = capt_data['channel_id']
+            channel = self.bot.get_channel(int(channel_id))
+            
+            if not channel:
+                # Сообщение сбора недоступно: закрываем сбор без обновления кнопок
+                logger.warning(f"Канал {channel_id} не найден для сбора {capt_data['name']}, сбор удаляется")
+                await self.repository.remove(message_id)
+                return
                 
-                # Удаляем сбор из базы данных и из памяти
-                self.capt_db.delete_capt(message_id)
-                if message_id in self.active_capts:
-                    del self.active_capts[message_id]
-                    
-                logger.info(f"Автоматически закрыт просроченный сбор '{capt_data['name']}' (ID: {message_id}, время: {capt_data['datetime']})")
+            # Закрываем обработчик команд: нажатия, пришедшие позже, не применяются
+            CaptActors.get_instance().close(message_id)
+
+            # Деактивируем кнопки сбора, редактируя сообщение по ID без его получения
+            view = CaptView()
+            view.update_button_ids(message_id)
+            for child in view.children:
+                child.disabled = True
+            
+            edited = await MessageOps.edit(channel, message_id, view=view)
+            if edited is False:
+                logger.warning(f"Сообщение {message_id} не найдено для сбора {capt_data['name']}")
+                await self.repository.remove(message_id)
+                return
+            
+            # Отправляем накопленную сводку и сообщение о закрытии в тред, если он существует
+            if 'thread_id' in capt_data and capt_data['thread_id']:
+                try:
+                    digest = ThreadDigest.get_instance()
+                    await digest.flush(message_id)
+                    digest.forget(message_id)
+                    thread_id = capt_data['thread_id']
+                    thread = channel.get_thread(thread_id)
+                    if thread:
+                        await Dispatcher.get_instance().submit(
+                            Dispatcher.channel_route(thread),
+                            thread.send,
+                            f"**Сбор автоматически закрыт**, так как время сбора ({capt_data['datetime']}) уже прошло.",
+                            priority=Dispatcher.PRIORITY_NOTIFICATION
+                        )
+                except Exception as thread_error:
+                    logger.error(f"Ошибка при отправке сообщения в тред для сбора {message_id}: {thread_error}", exc_info=True)
+            
+            # Удаляем сбор из базы данных и из памяти
+            await self.repository.remove(message_id)
                 
-            except Exception as e:
-                logger.error(f"Ошибка при закрытии просроченного сбора {message_id}: {e}", exc_info=True)
\ No newline at end of file
+            logger.info(f"Автоматически закрыт просроченный сбор '{capt_data['name']}' (ID: {message_id}, время: {capt_data['datetime']})")
+            
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии просроченного сбора {message_id}: {e}", exc_info=True)
@@ -0,0 +1,163 @@
+import os
+import asyncio
+
+from tools.logger import Logger
+from tools.dispatcher import Dispatcher
+
+logger = Logger.get_instance()
+
+# Типы событий сбора и их заголовки в сводке (в порядке вывода)
+EVENT_TITLES = {
+    'joined': "Присоединились к основному списку",
+    'joined_extra': "Присоединились к дополнительному списку",
+    'moved_to_main': "Перемещены в основной список",
+    'moved_to_extra': "Перемещены в дополнительный список",
+    'left': "Покинули основной список",
+    'left_extra': "Покинули дополнительный список",
+}
+
+class ThreadDigest:
+    """
+    Сводные уведомления в тредах сборов.
+    События присоединения, выхода и перемещения участников накапливаются
+    по каждому сбору и отправляются в тред одним сообщением раз в интервал
+    CAPT_DIGEST_INTERVAL. Сообщение содержит не больше CAPT_DIGEST_MAX_BATCH
+    событий, остальные переносятся в сводку следующего интервала.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = ThreadDigest()
+        return cls._instance
+
+    def __init__(self, interval=None, max_batch=None):
+        """
+        Инициализация
+
+        Args:
+            interval: Интервал отправки сводки в секундах (по умолчанию из CAPT_DIGEST_INTERVAL или 5)
+            max_batch: Максимальное количество событий в одной сводке (по умолчанию из CAPT_DIGEST_MAX_BATCH или 25)
+        """
+        if interval is None:
+            interval = float(os.getenv('CAPT_DIGEST_INTERVAL', 5))
+        if max_batch is None:
+            max_batch = int(os.getenv('CAPT_DIGEST_MAX_BATCH', 25))
+
+        self.interval = interval
+        self.max_batch = max(1, max_batch)
+        # Накопленные события: {message_id: {'channel', 'thread_id', 'events': [(тип, упоминание)]}}
+        self._queues = {}
+        self._tasks = {}
+
+    def add_event(self, interaction, capt_data, event, mention):
+        """
+        Добавляет событие сбора в сводку
+
+        Args:
+            interaction: Объект взаимодействия Discord (канал сбора)
+            capt_data: Данные сбора
+            event: Тип события (ключ EVENT_TITLES)
+            mention: Упоминание участника
+        """
+        thread_id = capt_data.get('thread_id')
+        if not thread_id:
+            return
+
+        message_id = str(interaction.message.id)
+        queue = self._queues.setdefault(message_id, {
+            'channel': interaction.channel,
+            'thread_id': int(thread_id),
+            'events': []
+        })
+        queue['events'].append((event, mention))
+
+        task = self._tasks.get(message_id)
+        if task is None or task.done():
+            self._tasks[message_id] = asyncio.create_task(self._flush_loop(message_id))
+
+    async def _flush_loop(self, message_id):
+        """Отправляет по одной сводке за интервал, пока есть накопленные события"""
+        try:
+            while message_id in self._queues:
+                await asyncio.sleep(self.interval)
+                await self._send_next(message_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при отправке сводки в тред сбора {message_id}: {e}", exc_info=True)
+        finally:
+            if self._tasks.get(message_id) is asyncio.current_task():
+                del self._tasks[message_id]
+
+    @staticmethod
+    def format_digest(events):
+        """
+        Формирует текст сводки
+
+        Args:
+            events: Список кортежей (тип события, упоминание)
+
+        Returns:
+            Текст сообщения, по строке на каждый тип события
+        """
+        grouped = {}
+        for event, mention in events:
+            grouped.setdefault(event, []).append(mention)
+
+        lines = [
+            f"**{title}:** {', '.join(grouped[event])}"
+            for event, title in EVENT_TITLES.items() if event in grouped
+        ]
+        return "\n".join(lines)
+
+    async def _send_next(self, message_id):
+        """
+        Отправляет одну сводку из первых max_batch накопленных событий сбора.
+        Остальные события остаются в очереди до следующей отправки.
+        """
+        queue = self._queues.get(message_id)
+        if not queue:
+            return
+
+        events = queue['events'][:self.max_batch]
+        del queue['events'][:self.max_batch]
+        if not queue['events']:
+            self._queues.pop(message_id, None)
+
+        thread = queue['channel'].get_thread(queue['thread_id'])
+        if not thread:
+            logger.warning(f"Тред {queue['thread_id']} не найден для сбора {message_id}")
+            self._queues.pop(message_id, None)
+            return
+
+        await Dispatcher.get_instance().submit(
+            Dispatcher.channel_route(thread),
+            thread.send,
+            self.format_digest(events),
+            priority=Dispatcher.PRIORITY_NOTIFICATION
+        )
+
+    async def flush(self, message_id):
+        """
+        Немедленно отправляет все накопленные события сбора (например, при его закрытии),
+        не больше max_batch событий в одном сообщении
+
+        Args:
+            message_id: ID сообщения сбора
+        """
+        message_id = str(message_id)
+        while message_id in self._queues:
+            await self._send_next(message_id)
+
+    def forget(self, message_id):
+        """Отбрасывает накопленные события сбора"""
+        message_id = str(message_id)
+        self._queues.pop(message_id, None)
+
+        task = self._tasks.pop(message_id, None)
+        if task:
+            task.cancel()
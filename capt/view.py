@@ -6,11 +6,10 @@ from capt.buttons import JoinButton, JoinExtraButton, LeaveButton, CloseButton
 logger = Logger.get_instance()
 
 class CaptView(discord.ui.View):
-    """View с кнопками для сбора игроков"""
+    """View с кнопками для сбора игроков (данные сбора хранятся в CaptRepository)"""
     
-    def __init__(self, capt_data):
+    def __init__(self):
         super().__init__(timeout=None)
-        self.capt_data = capt_data
 
         self.join_button = JoinButton()
         self.extra_button = JoinExtraButton()
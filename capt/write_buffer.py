@@ -0,0 +1,104 @@
+import os
+import asyncio
+
+from tools.logger import Logger
+from database.capt import get_instance as get_capt_db, snapshot_capt_data
+from database.async_db import AsyncDatabase
+
+logger = Logger.get_instance()
+
+class CaptWriteBuffer:
+    """
+    Буфер отложенной записи сборов.
+    Изменения сбора только помечают его как измененный, а сохранение в базу
+    данных выполняется не чаще одного раза за интервал CAPT_FLUSH_INTERVAL,
+    поэтому серия нажатий кнопок записывается одной операцией.
+    При сбое теряются изменения не более чем за один интервал.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = CaptWriteBuffer()
+        return cls._instance
+
+    def __init__(self, interval=None):
+        """
+        Инициализация буфера
+
+        Args:
+            interval: Интервал сохранения в секундах (по умолчанию из CAPT_FLUSH_INTERVAL или 2)
+        """
+        if interval is None:
+            interval = float(os.getenv('CAPT_FLUSH_INTERVAL', 2))
+
+        self.interval = interval
+        self.capt_db = get_capt_db()
+        self.async_db = AsyncDatabase.get_instance()
+        # Измененные сборы, ожидающие сохранения: {message_id: capt_data}
+        self._dirty = {}
+        self._flush_task = None
+
+    def mark_dirty(self, message_id, capt_data):
+        """
+        Помечает сбор как измененный и планирует его сохранение
+
+        Args:
+            message_id: ID сообщения сбора
+            capt_data: Данные сбора в памяти
+        """
+        self._dirty[message_id] = capt_data
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def discard(self, message_id):
+        """Отменяет отложенное сохранение сбора (например, перед его удалением)"""
+        self._dirty.pop(message_id, None)
+
+    async def _flush_later(self):
+        """Сохраняет накопленные изменения по истечении интервала"""
+        try:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при отложенном сохранении сборов: {e}", exc_info=True)
+
+    def _take_snapshots(self):
+        """Забирает все измененные сборы из буфера и копирует их данные"""
+        dirty, self._dirty = self._dirty, {}
+        return [(message_id, snapshot_capt_data(capt_data)) for message_id, capt_data in dirty.items()]
+
+    async def flush(self):
+        """
+        Сохраняет все измененные сборы в базу данных
+
+        Returns:
+            Количество сохраненных сборов
+        """
+        snapshots = self._take_snapshots()
+        if not snapshots:
+            return 0
+
+        changed = await self.async_db.write(self.capt_db.save_capts, snapshots)
+        logger.info(f"Сохранено сборов из буфера: {len(snapshots)} (изменено строк: {changed})")
+        return len(snapshots)
+
+    def flush_pending(self):
+        """
+        Синхронно сохраняет оставшиеся изменения при остановке бота,
+        когда цикл событий уже завершен. Запись выполняется в потоке-писателе
+        после сохранения, которое могло начаться до остановки цикла.
+        """
+        snapshots = self._take_snapshots()
+        if not snapshots:
+            return 0
+
+        changed = self.async_db.write_sync(self.capt_db.save_capts, snapshots)
+        logger.info(f"При остановке сохранено сборов из буфера: {len(snapshots)} (изменено строк: {changed})")
+        return len(snapshots)
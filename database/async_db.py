@@ -0,0 +1,92 @@
+import os
+import asyncio
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.logger import Logger
+from database.connection import ConnectionPool
+
+logger = Logger.get_instance()
+
+class AsyncDatabase:
+    """
+    Асинхронный фасад для работы с базами данных SQLite.
+    Все записи выполняются последовательно в отдельном потоке-писателе,
+    чтения выполняются параллельно в пуле потоков-читателей,
+    поэтому обращения к базе данных не блокируют цикл событий бота.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = AsyncDatabase()
+        return cls._instance
+
+    def __init__(self, read_workers=None):
+        """
+        Инициализация потоков для чтения и записи
+
+        Args:
+            read_workers: Количество потоков для чтения (по умолчанию из DB_READ_WORKERS или 4)
+        """
+        if read_workers is None:
+            read_workers = int(os.getenv('DB_READ_WORKERS', 4))
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+
+        logger.info(f"Асинхронный слой базы данных запущен (потоков чтения: {read_workers})")
+
+    async def write(self, func, *args, **kwargs):
+        """
+        Выполняет изменяющую операцию в потоке-писателе
+
+        Args:
+            func: Синхронный метод менеджера базы данных
+            *args, **kwargs: Аргументы метода
+
+        Returns:
+            Результат выполнения метода
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(func, *args, **kwargs))
+
+    def write_sync(self, func, *args, **kwargs):
+        """
+        Выполняет изменяющую операцию в потоке-писателе и блокирует до ее завершения.
+        Для кода вне цикла событий (например, при остановке бота): операция
+        встает в очередь после уже начатых записей и не выполняется параллельно с ними.
+
+        Args:
+            func: Синхронный метод менеджера базы данных
+            *args, **kwargs: Аргументы метода
+
+        Returns:
+            Результат выполнения метода
+        """
+        return self._writer.submit(functools.partial(func, *args, **kwargs)).result()
+
+    async def read(self, func, *args, **kwargs):
+        """
+        Выполняет операцию чтения в пуле потоков-читателей
+
+        Args:
+            func: Синхронный метод менеджера базы данных
+            *args, **kwargs: Аргументы метода
+
+        Returns:
+            Результат выполнения метода
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """Дожидается завершения всех операций и закрывает соединения"""
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        ConnectionPool.close_all_pools()
+        logger.info("Асинхронный слой базы данных остановлен")
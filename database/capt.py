@@ -1,152 +1,177 @@
 import sqlite3
-import json
-import os
-from datetime import datetime
 from tools.logger import Logger
+from database.storage import Storage
 
 logger = Logger.get_instance()
 
 class CaptDatabase:
     """Класс для работы с базой данных сборов игроков"""
-    
-    DB_PATH = "database/capt.db"
-    
-    def __init__(self):
-        """Инициализация и создание таблиц, если они не существуют"""
-        self.conn = None
-        self.cursor = None
-        self.connect()
-        self.create_tables()
-        
-    def connect(self):
-        """Подключение к базе данных"""
-        try:
-            self.conn = sqlite3.connect(self.DB_PATH)
-            self.cursor = self.conn.cursor()
-            logger.info(f"Подключение к базе данных сборов установлено: {self.DB_PATH}")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка подключения к базе данных сборов: {e}", exc_info=True)
-    
-    def create_tables(self):
-        """Создание необходимых таблиц в базе данных"""
-        try:
-            # Таблица сборов
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS capts (
-                    message_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    creator_id TEXT NOT NULL,
-                    creator_name TEXT NOT NULL,
-                    datetime TEXT NOT NULL,
-                    slots INTEGER NOT NULL,
-                    guild_id TEXT NOT NULL,
-                    channel_id TEXT NOT NULL,
-                    thread_id TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Таблица участников
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS participants (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    message_id TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    user_name TEXT NOT NULL,
-                    is_extra BOOLEAN NOT NULL DEFAULT 0,
-                    FOREIGN KEY (message_id) REFERENCES capts (message_id) ON DELETE CASCADE
+
+    def __init__(self, db_file=None):
+        """Подключение к единому хранилищу (таблицы создаются миграциями)"""
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
+
+        # Последнее сохраненное состояние сборов: {message_id: (заголовок, участники)}.
+        # Используется только в потоке записи
+        self._persisted = {}
+
+    def _load_persisted_state(self, conn, message_id):
+        """
+        Читает из базы данных сохраненное состояние сбора
+
+        Returns:
+            Кортеж (заголовок сбора или None, словарь {user_id: (user_name, is_extra, position, rank, joined_at)})
+        """
+        header_row = conn.execute('''
+            SELECT name, creator_id, creator_name, datetime, slots, thread_id
+            FROM capts WHERE message_id = ?
+        ''', (message_id,)).fetchone()
+        header = tuple(header_row) if header_row else None
+
+        rows = {}
+        for participant in conn.execute('''
+            SELECT user_id, user_name, is_extra, position, rank, joined_at
+            FROM participants WHERE message_id = ?
+        ''', (message_id,)):
+            rows[participant[0]] = (participant[1], int(participant[2]), participant[3], participant[4], participant[5])
+
+        return header, rows
+
+    @staticmethod
+    def _build_state(capt_data):
+        """
+        Формирует сохраняемое состояние сбора из данных в памяти
+
+        Returns:
+            Кортеж (заголовок сбора, словарь {user_id: (user_name, is_extra, position, rank, joined_at)})
+        """
+        header = (
+            capt_data['name'],
+            str(capt_data['creator'].id),
+            capt_data['creator'].display_name,
+            capt_data['datetime'],
+            capt_data['slots'],
+            str(capt_data.get('thread_id', ''))
+        )
+
+        rows = {}
+        # Основной список записываем последним, чтобы он имел приоритет при дублировании
+        for is_extra, participants in ((1, capt_data['extra_participants']), (0, capt_data['participants'])):
+            for position, participant in enumerate(participants):
+                rows[str(participant.user_id)] = (
+                    participant.display_name, is_extra, position, participant.rank, participant.joined_at_text
                 )
-            ''')
-            
-            self.conn.commit()
-            logger.info("Таблицы для сборов созданы или уже существуют")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка создания таблиц для сборов: {e}", exc_info=True)
-    
+
+        return header, rows
+
     def save_capt(self, message_id, capt_data):
-        """Сохраняет или обновляет данные сбора"""
+        """
+        Сохраняет или обновляет данные сбора.
+        Сравнивает состояние с последним сохраненным и записывает только
+        добавленных, удаленных и перемещенных участников.
+
+        Returns:
+            Количество измененных строк или None в случае ошибки
+        """
         try:
-            # Проверяем существование сбора
-            self.cursor.execute("SELECT message_id FROM capts WHERE message_id = ?", (message_id,))
-            exists = self.cursor.fetchone()
-            
-            if exists:
-                # Обновляем существующий сбор
-                self.cursor.execute('''
-                    UPDATE capts 
-                    SET name = ?, creator_id = ?, creator_name = ?, datetime = ?, slots = ?, thread_id = ?
-                    WHERE message_id = ?
-                ''', (
-                    capt_data['name'],
-                    str(capt_data['creator'].id),
-                    capt_data['creator'].display_name,
-                    capt_data['datetime'],
-                    capt_data['slots'],
-                    str(capt_data.get('thread_id', '')),
-                    message_id
-                ))
-            else:
-                # Создаем новый сбор
-                self.cursor.execute('''
-                    INSERT INTO capts (message_id, name, creator_id, creator_name, datetime, slots, guild_id, channel_id, thread_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    message_id,
-                    capt_data['name'],
-                    str(capt_data['creator'].id),
-                    capt_data['creator'].display_name,
-                    capt_data['datetime'],
-                    capt_data['slots'],
-                    str(capt_data['guild_id']),
-                    str(capt_data['channel_id']),
-                    str(capt_data.get('thread_id', ''))
-                ))
-            
-            # Удаляем старых участников
-            self.cursor.execute("DELETE FROM participants WHERE message_id = ?", (message_id,))
-            
-            # Добавляем основных участников
-            for participant in capt_data['participants']:
-                self.cursor.execute('''
-                    INSERT INTO participants (message_id, user_id, user_name, is_extra)
-                    VALUES (?, ?, ?, 0)
-                ''', (
-                    message_id,
-                    str(participant.id),
-                    participant.display_name
-                ))
-            
-            # Добавляем дополнительных участников
-            for participant in capt_data['extra_participants']:
-                self.cursor.execute('''
-                    INSERT INTO participants (message_id, user_id, user_name, is_extra)
-                    VALUES (?, ?, ?, 1)
-                ''', (
-                    message_id,
-                    str(participant.id),
-                    participant.display_name
-                ))
-            
-            self.conn.commit()
-            logger.info(f"Сбор с ID {message_id} сохранен в базе данных")
-            return True
+            header, rows = self._build_state(capt_data)
+
+            with self.pool.transaction() as conn:
+                persisted = self._persisted.get(message_id)
+                if persisted is None:
+                    persisted = self._load_persisted_state(conn, message_id)
+                old_header, old_rows = persisted
+
+                changed = 0
+
+                if header != old_header:
+                    # Создаем или обновляем сбор без удаления строки, чтобы не затронуть участников
+                    conn.execute('''
+                        INSERT INTO capts (message_id, name, creator_id, creator_name, datetime, slots, thread_id, guild_id, channel_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (message_id) DO UPDATE SET
+                            name = excluded.name,
+                            creator_id = excluded.creator_id,
+                            creator_name = excluded.creator_name,
+                            datetime = excluded.datetime,
+                            slots = excluded.slots,
+                            thread_id = excluded.thread_id
+                    ''', (message_id, *header, str(capt_data['guild_id']), str(capt_data['channel_id'])))
+                    changed += 1
+
+                removed = [(message_id, user_id) for user_id in old_rows if user_id not in rows]
+                inserted = [
+                    (message_id, user_id, *row)
+                    for user_id, row in rows.items() if user_id not in old_rows
+                ]
+                moved = [
+                    (*row, message_id, user_id)
+                    for user_id, row in rows.items() if user_id in old_rows and old_rows[user_id] != row
+                ]
+
+                if removed:
+                    conn.executemany(
+                        "DELETE FROM participants WHERE message_id = ? AND user_id = ?",
+                        removed
+                    )
+                if inserted:
+                    conn.executemany('''
+                        INSERT INTO participants (message_id, user_id, user_name, is_extra, position, rank, joined_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', inserted)
+                if moved:
+                    conn.executemany('''
+                        UPDATE participants SET user_name = ?, is_extra = ?, position = ?, rank = ?, joined_at = ?
+                        WHERE message_id = ? AND user_id = ?
+                    ''', moved)
+
+                changed += len(removed) + len(inserted) + len(moved)
+
+            self._persisted[message_id] = (header, rows)
+
+            logger.info(
+                f"Сбор с ID {message_id} сохранен в базе данных "
+                f"(добавлено: {len(inserted)}, удалено: {len(removed)}, перемещено: {len(moved)})"
+            )
+            return changed
         except sqlite3.Error as e:
+            # Состояние в базе неизвестно, при следующем сохранении перечитаем его
+            self._persisted.pop(message_id, None)
             logger.error(f"Ошибка сохранения сбора {message_id}: {e}", exc_info=True)
-            return False
-    
+            return None
+
+    def save_capts(self, capts):
+        """
+        Сохраняет несколько сборов подряд
+
+        Args:
+            capts: Список кортежей (message_id, capt_data)
+
+        Returns:
+            Общее количество измененных строк
+        """
+        changed = 0
+        for message_id, capt_data in capts:
+            changed += self.save_capt(message_id, capt_data) or 0
+        return changed
+
     def get_capt(self, message_id):
         """Получает данные сбора из базы данных"""
         try:
+            cursor = self.pool.get_connection().cursor()
+
             # Получаем основные данные
-            self.cursor.execute('''
+            cursor.execute('''
                 SELECT message_id, name, creator_id, creator_name, datetime, slots, guild_id, channel_id, thread_id
                 FROM capts WHERE message_id = ?
             ''', (message_id,))
-            
-            capt_row = self.cursor.fetchone()
+
+            capt_row = cursor.fetchone()
             if not capt_row:
                 return None
-            
+
             # Формируем базовую структуру
             capt_info = {
                 "message_id": capt_row[0],
@@ -163,87 +188,103 @@ class CaptDatabase:
                 "participants": [],
                 "extra_participants": []
             }
-            
+
             # Получаем участников
-            self.cursor.execute('''
-                SELECT user_id, user_name, is_extra
+            cursor.execute('''
+                SELECT user_id, user_name, is_extra, rank, joined_at
                 FROM participants WHERE message_id = ?
+                ORDER BY is_extra, position
             ''', (message_id,))
-            
-            for participant in self.cursor.fetchall():
+
+            for participant in cursor.fetchall():
                 participant_info = {
                     "id": participant[0],
-                    "name": participant[1]
+                    "name": participant[1],
+                    "rank": participant[3],
+                    "joined_at": participant[4]
                 }
-                
+
                 if participant[2]:  # is_extra
                     capt_info["extra_participants"].append(participant_info)
                 else:
                     capt_info["participants"].append(participant_info)
-            
+
             return capt_info
-        
+
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения сбора {message_id}: {e}", exc_info=True)
             return None
-    
+
     def get_all_capts(self):
         """Получает все активные сборы из базы данных"""
         try:
             # Получаем все ID сборов
-            self.cursor.execute("SELECT message_id FROM capts")
-            capt_ids = self.cursor.fetchall()
-            
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute("SELECT message_id FROM capts")
+            capt_ids = cursor.fetchall()
+
             result = {}
             for (message_id,) in capt_ids:
                 capt_info = self.get_capt(message_id)
                 if capt_info:
                     result[message_id] = capt_info
-            
+
             return result
-        
+
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения всех сборов: {e}", exc_info=True)
             return {}
-    
+
     def delete_capt(self, message_id):
         """Удаляет сбор из базы данных"""
         try:
             # Каскадное удаление удалит и всех участников
-            self.cursor.execute("DELETE FROM capts WHERE message_id = ?", (message_id,))
-            self.conn.commit()
+            with self.pool.transaction() as conn:
+                conn.execute("DELETE FROM capts WHERE message_id = ?", (message_id,))
+            self._persisted.pop(message_id, None)
             logger.info(f"Сбор с ID {message_id} удален из базы данных")
             return True
         except sqlite3.Error as e:
             logger.error(f"Ошибка удаления сбора {message_id}: {e}", exc_info=True)
             return False
-    
+
     def clean_old_capts(self, days=7):
         """Удаляет старые сборы"""
         try:
             # Формируем запрос с конкретным значением дней
             days_str = f"-{days} days"
-            self.cursor.execute(f'''
-                DELETE FROM capts
-                WHERE datetime('now', ?) > datetime(created_at)
-            ''', (days_str,))
-            
-            deleted_count = self.cursor.rowcount
-            self.conn.commit()
-            
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('''
+                    DELETE FROM capts
+                    WHERE datetime('now', ?) > datetime(created_at)
+                ''', (days_str,))
+
+            deleted_count = cursor.rowcount
+
             if deleted_count > 0:
+                # Удаленные сборы перечитаются из базы при следующем сохранении
+                self._persisted.clear()
                 logger.info(f"Удалено {deleted_count} старых сборов (старше {days} дней)")
-            
+
             return deleted_count
         except sqlite3.Error as e:
             logger.error(f"Ошибка при очистке старых сборов: {e}", exc_info=True)
             return 0
-    
+
     def close(self):
-        """Закрывает соединение с базой данных"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Соединение с базой данных сборов закрыто")
+        """Закрывает соединения с базой данных"""
+        self.pool.close_all()
+        logger.info("Соединение с базой данных сборов закрыто")
+
+def snapshot_capt_data(capt_data):
+    """
+    Создает копию данных сбора для передачи в поток базы данных,
+    чтобы списки участников не изменялись во время сохранения
+    """
+    snapshot = dict(capt_data)
+    snapshot['participants'] = list(capt_data['participants'])
+    snapshot['extra_participants'] = list(capt_data['extra_participants'])
+    return snapshot
 
 # Создаем синглтон для работы с базой данных
 _instance = None
@@ -253,4 +294,4 @@ def get_instance():
     global _instance
     if _instance is None:
         _instance = CaptDatabase()
-    return _instance 
\ No newline at end of file
+    return _instance
@@ -0,0 +1,122 @@
+import sqlite3
+import os
+import threading
+
+from contextlib import contextmanager
+
+from tools.logger import Logger
+
+logger = Logger.get_instance()
+
+class ConnectionPool:
+    """
+    Пул постоянных соединений SQLite.
+    Каждый поток получает одно долгоживущее соединение с файлом базы данных,
+    поэтому менеджеры не переподключаются при каждом вызове, а скомпилированные
+    запросы переиспользуются через кэш выражений sqlite3.
+    """
+
+    # Размер кэша подготовленных выражений на одно соединение
+    CACHED_STATEMENTS = 256
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_file, pragmas=()):
+        self.db_file = db_file
+        self.pragmas = tuple(pragmas)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+    def _create_connection(self):
+        """Создает новое соединение с базой данных"""
+        conn = sqlite3.connect(
+            self.db_file,
+            cached_statements=self.CACHED_STATEMENTS,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")  # Включаем поддержку внешних ключей
+        for pragma in self.pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+
+        with self._lock:
+            self._connections.append(conn)
+
+        logger.info(f"Открыто соединение с базой данных {self.db_file} для потока {threading.current_thread().name}")
+        return conn
+
+    def get_connection(self):
+        """
+        Получение соединения текущего потока
+
+        Returns:
+            Объект sqlite3.Connection, закрепленный за текущим потоком
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Контекстный менеджер транзакции: фиксирует изменения при успехе
+        и откатывает их при исключении
+
+        Yields:
+            Объект sqlite3.Connection текущего потока
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close_all(self):
+        """Закрывает все открытые соединения пула"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка при закрытии соединения с {self.db_file}: {e}", exc_info=True)
+
+        self._local = threading.local()
+        logger.info(f"Закрыты соединения с базой данных {self.db_file}")
+
+    @classmethod
+    def get_instance(cls, db_file, pragmas=()):
+        """
+        Получение пула соединений для файла базы данных
+
+        Args:
+            db_file: Путь к файлу базы данных
+            pragmas: Настройки PRAGMA для новых соединений (применяются при создании пула)
+
+        Returns:
+            Экземпляр пула соединений
+        """
+        with cls._pools_lock:
+            pool = cls._pools.get(db_file)
+            if pool is None:
+                pool = cls(db_file, pragmas)
+                cls._pools[db_file] = pool
+            return pool
+
+    @classmethod
+    def close_all_pools(cls):
+        """Закрывает соединения всех пулов"""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+
+        for pool in pools:
+            pool.close_all()
@@ -1,92 +1,65 @@
 import sqlite3
-import os
+import json
 
 from tools.logger import Logger
+from database.storage import Storage
 
 logger = Logger.get_instance()
 
+# Столбцы таблицы заявок (для выборки вместе с кнопками под префиксом)
+SUBMISSION_COLUMNS = (
+    'id', 'message_id', 'channel_id', 'type', 'author_id', 'order_id', 'order_price',
+    'current_rank', 'next_rank', 'data', 'status', 'moderator_id', 'reason',
+    'created_at', 'decided_at'
+)
+
 class DatabaseManager:
     """Класс для управления базой данных SQLite"""
 
-    def __init__(self, db_file="database/reactions.db"):
-        self.db_file = db_file
-        self.conn = None
-
-        os.makedirs(os.path.dirname(db_file), exist_ok=True)
-
-        self._init_db()
-
-    def _init_db(self):
-        """Инициализация базы данных и создание необходимых таблиц"""
-        try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
+    def __init__(self, db_file=None):
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
 
-            # Создаем таблицу для хранения данных о кнопках реакций
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reaction_buttons (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    message_id TEXT NOT NULL,
-                    channel_id TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    approve_button_id TEXT NOT NULL,
-                    reject_button_id TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            # Создаем таблицу для хранения логов действий с кнопками
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reaction_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    message_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    moderator_id INTEGER NOT NULL,
-                    action TEXT NOT NULL,
-                    reason TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            self.conn.commit()
-            logger.info(f"База данных инициализирована: {self.db_file}")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка при инициализации базы данных: {e}", exc_info=True)
-
-    def add_reaction_buttons(self, message_id, channel_id, submission_type, approve_button_id, reject_button_id):
+    def add_reaction_buttons(self, message_id, channel_id, submission_type, approve_button_id, reject_button_id,
+                             author_id=None, submission_id=None):
         """
         Добавление информации о кнопках реакции
 
         Args:
             message_id: ID сообщения с кнопками
             channel_id: ID канала с сообщением
-            submission_type: Тип заявки (report/suggestion)
+            submission_type: Тип заявки (жалоба/предложение/запрос/повышение)
             approve_button_id: ID кнопки одобрения
             reject_button_id: ID кнопки отклонения
+            author_id: ID пользователя, создавшего заявку
+            submission_id: ID записи заявки в таблице submissions
 
         Returns:
             ID записи в базе данных или None в случае ошибки
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO reaction_buttons (message_id, channel_id, type, approve_button_id, reject_button_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (str(message_id), str(channel_id), submission_type, approve_button_id, reject_button_id))
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO reaction_buttons
+                    (message_id, channel_id, type, approve_button_id, reject_button_id, author_id, submission_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    str(message_id),
+                    str(channel_id),
+                    submission_type,
+                    approve_button_id,
+                    reject_button_id,
+                    str(author_id) if author_id else None,
+                    submission_id
+                ))
 
-            self.conn.commit()
             record_id = cursor.lastrowid
             logger.info(f"Добавлены кнопки реакции для сообщения {message_id} в канале {channel_id}")
             return record_id
         except sqlite3.Error as e:
             logger.error(f"Ошибка при добавлении информации о кнопках: {e}", exc_info=True)
             return None
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def get_all_reaction_buttons(self):
         """
@@ -96,9 +69,8 @@ class DatabaseManager:
             Список словарей с данными о кнопках реакции
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('SELECT * FROM reaction_buttons')
             rows = cursor.fetchall()
@@ -112,6 +84,8 @@ class DatabaseManager:
                     'type': row['type'],
                     'approve_button_id': row['approve_button_id'],
                     'reject_button_id': row['reject_button_id'],
+                    'author_id': row['author_id'],
+                    'submission_id': row['submission_id'],
                     'created_at': row['created_at']
                 })
 
@@ -120,9 +94,6 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении данных о кнопках: {e}", exc_info=True)
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def delete_reaction_buttons(self, message_id, channel_id):
         """
@@ -136,24 +107,18 @@ class DatabaseManager:
             True в случае успеха, False в случае ошибки
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('''
+                    DELETE FROM reaction_buttons
+                    WHERE message_id = ? AND channel_id = ?
+                ''', (str(message_id), str(channel_id)))
 
-            cursor.execute('''
-                DELETE FROM reaction_buttons
-                WHERE message_id = ? AND channel_id = ?
-            ''', (str(message_id), str(channel_id)))
-
-            self.conn.commit()
             affected_rows = cursor.rowcount
             logger.info(f"Удалено {affected_rows} записей о кнопках реакции для сообщения {message_id}")
             return affected_rows > 0
         except sqlite3.Error as e:
             logger.error(f"Ошибка при удалении информации о кнопках: {e}", exc_info=True)
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def get_button_info_by_id(self, button_id):
         """
@@ -166,9 +131,8 @@ class DatabaseManager:
             Словарь с информацией о кнопке или None, если кнопка не найдена
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('''
                 SELECT * FROM reaction_buttons
@@ -178,27 +142,138 @@ class DatabaseManager:
             row = cursor.fetchone()
 
             if row:
-                button_info = {
-                    'id': row['id'],
-                    'message_id': row['message_id'],
-                    'channel_id': row['channel_id'],
-                    'type': row['type'],
-                    'approve_button_id': row['approve_button_id'],
-                    'reject_button_id': row['reject_button_id'],
-                    'created_at': row['created_at'],
-                    'is_approve': row['approve_button_id'] == button_id
-                }
                 logger.info(f"Найдена информация о кнопке {button_id}")
-                return button_info
+                return self._button_from_row(row, button_id)
 
             logger.warning(f"Кнопка с ID {button_id} не найдена в базе данных")
             return None
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении информации о кнопке: {e}", exc_info=True)
             return None
-        finally:
-            if self.conn:
-                self.conn.close()
+
+    def get_button_with_submission(self, button_id):
+        """
+        Получение информации о кнопке вместе с ее заявкой одним запросом
+
+        Args:
+            button_id: ID кнопки
+
+        Returns:
+            Кортеж (информация о кнопке, заявка); заявка None, если она не привязана
+            к кнопке, и (None, None), если кнопка не найдена
+        """
+        try:
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
+
+            submission_columns = ", ".join(f"s.{column} AS s_{column}" for column in SUBMISSION_COLUMNS)
+            cursor.execute(f'''
+                SELECT b.*, {submission_columns}
+                FROM reaction_buttons b
+                LEFT JOIN submissions s ON s.id = b.submission_id
+                WHERE b.approve_button_id = ? OR b.reject_button_id = ?
+            ''', (button_id, button_id))
+
+            row = cursor.fetchone()
+
+            if row:
+                submission = self._submission_from_row(row, prefix='s_') if row['s_id'] is not None else None
+                return self._button_from_row(row, button_id), submission
+
+            logger.warning(f"Кнопка с ID {button_id} не найдена в базе данных")
+            return None, None
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при получении кнопки {button_id} с заявкой: {e}", exc_info=True)
+            return None, None
+
+    @staticmethod
+    def _button_from_row(row, button_id):
+        """Преобразует строку таблицы кнопок в словарь"""
+        return {
+            'id': row['id'],
+            'message_id': row['message_id'],
+            'channel_id': row['channel_id'],
+            'type': row['type'],
+            'approve_button_id': row['approve_button_id'],
+            'reject_button_id': row['reject_button_id'],
+            'author_id': row['author_id'],
+            'submission_id': row['submission_id'],
+            'created_at': row['created_at'],
+            'is_approve': row['approve_button_id'] == button_id
+        }
+
+    @staticmethod
+    def _submission_from_row(row, prefix=''):
+        """Преобразует строку таблицы заявок (столбцы с префиксом prefix) в словарь"""
+        submission = {column: row[prefix + column] for column in SUBMISSION_COLUMNS}
+        submission['data'] = json.loads(submission['data']) if submission['data'] else {}
+        return submission
+
+    def add_submission(self, message_id, channel_id, submission_type, author_id, data):
+        """
+        Сохранение заявки в виде структурированной записи
+
+        Args:
+            message_id: ID сообщения с заявкой
+            channel_id: ID канала заявки
+            submission_type: Тип заявки (жалоба/предложение/запрос/повышение)
+            author_id: ID пользователя, создавшего заявку
+            data: Данные заявки (словарь с полями)
+
+        Returns:
+            ID записи в базе данных или None в случае ошибки
+        """
+        try:
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO submissions
+                    (message_id, channel_id, type, author_id, order_id, order_price, current_rank, next_rank, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    str(message_id),
+                    str(channel_id),
+                    submission_type,
+                    str(author_id),
+                    data.get('order_id'),
+                    data.get('order_price'),
+                    data.get('current_rank'),
+                    data.get('next_rank'),
+                    json.dumps(data, ensure_ascii=False, default=str)
+                ))
+
+            submission_id = cursor.lastrowid
+            logger.info(f"Сохранена заявка '{submission_type}' с ID {submission_id} для сообщения {message_id}")
+            return submission_id
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при сохранении заявки: {e}", exc_info=True)
+            return None
+
+    def set_submission_decision(self, submission_id, status, moderator_id, reason=None):
+        """
+        Сохранение решения по заявке
+
+        Args:
+            submission_id: ID записи заявки
+            status: Статус заявки (approved/rejected)
+            moderator_id: ID модератора, принявшего решение
+            reason: Причина отказа (только для rejected)
+
+        Returns:
+            True, если успешно, False в случае ошибки
+        """
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    UPDATE submissions
+                    SET status = ?, moderator_id = ?, reason = ?, decided_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, str(moderator_id), reason, submission_id))
+
+            logger.info(f"Заявке с ID {submission_id} установлен статус {status}")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при сохранении решения по заявке {submission_id}: {e}", exc_info=True)
+            return False
 
     def log_reaction_action(self, message_id: int, channel_id: int, user_id: int, 
                           moderator_id: int, action: str, reason: str = None):
@@ -217,24 +292,18 @@ class DatabaseManager:
             True, если успешно, False в случае ошибки
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO reaction_logs
-                (message_id, channel_id, user_id, moderator_id, action, reason)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (message_id, channel_id, user_id, moderator_id, action, reason))
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO reaction_logs
+                    (message_id, channel_id, user_id, moderator_id, action, reason)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (message_id, channel_id, user_id, moderator_id, action, reason))
 
-            self.conn.commit()
             logger.info(f"Действие {action} с сообщением {message_id} в канале {channel_id} записано в логи")
             return True
         except sqlite3.Error as e:
             logger.error(f"Ошибка при логировании действия с кнопкой реакции: {e}", exc_info=True)
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def get_reaction_logs(self, limit: int = 100):
         """
@@ -247,9 +316,8 @@ class DatabaseManager:
             Список словарей с информацией о логах
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('''
                 SELECT * FROM reaction_logs
@@ -277,17 +345,14 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении логов действий с кнопками реакций: {e}", exc_info=True)
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
 
     @classmethod
-    def get_instance(cls, db_file="database/reactions.db"):
+    def get_instance(cls, db_file=None):
         """
         Получение глобального экземпляра менеджера базы данных
 
         Args:
-            db_file: Путь к файлу базы данных
+            db_file: Путь к файлу базы данных (по умолчанию единый файл хранилища)
 
         Returns:
             Экземпляр менеджера базы данных
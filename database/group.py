@@ -1,8 +1,8 @@
 import sqlite3
-import os
 from datetime import datetime, timedelta
 
 from tools.logger import Logger
+from database.storage import Storage
 
 logger = Logger.get_instance()
 
@@ -11,6 +11,9 @@ class GroupDatabase:
     
     _instance = None
     
+    # Максимальное количество параметров в одном запросе
+    MAX_QUERY_PARAMS = 500
+    
     @classmethod
     def get_instance(cls):
         """Получение единственного экземпляра класса (Singleton)"""
@@ -18,121 +21,117 @@ class GroupDatabase:
             cls._instance = GroupDatabase()
         return cls._instance
     
-    def __init__(self, db_file="database/group.db"):
-        """Инициализация соединения с базой данных"""
-        self.db_file = db_file
-        self.conn = None
-        self.cursor = None
-        
-        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    def __init__(self, db_file=None):
+        """Подключение к единому хранилищу (таблицы создаются миграциями)"""
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
         
-        try:
-            self.conn = sqlite3.connect(db_file)
-            self.conn.execute("PRAGMA foreign_keys = ON")  # Включаем поддержку внешних ключей
-            self.cursor = self.conn.cursor()
-            
-            # Создаем необходимые таблицы
-            self.create_tables()
-            
-            logger.info(f"Соединение с базой данных групп установлено: {db_file}")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка подключения к базе данных групп: {e}", exc_info=True)
-    
-    def create_tables(self):
-        """Создание необходимых таблиц в базе данных"""
-        try:
-            # Таблица для хранения групп сообщений
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS group_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    group_id TEXT NOT NULL,
-                    message_id TEXT NOT NULL,
-                    channel_id TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    creator_id TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    scheduled_deletion TIMESTAMP NOT NULL
-                )
-            ''')
-            
-            self.conn.commit()
-            logger.info("Таблицы для сообщений групп созданы или уже существуют")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка создания таблиц для сообщений групп: {e}", exc_info=True)
+        logger.info(f"Соединение с базой данных групп установлено: {self.db_file}")
     
     def save_message(self, group_id, message_id, channel_id, message_type, creator_id, minutes_to_delete=5):
-        """Сохраняет данные о сообщении группы"""
+        """
+        Сохраняет данные о сообщении группы
+
+        Returns:
+            Время запланированного удаления (datetime) или None в случае ошибки
+        """
         try:
             # Вычисляем время планируемого удаления
             deletion_time = datetime.now() + timedelta(minutes=minutes_to_delete)
             deletion_time_str = deletion_time.strftime("%Y-%m-%d %H:%M:%S")
             
             # Сохраняем сообщение
-            self.cursor.execute('''
-                INSERT INTO group_messages 
-                (group_id, message_id, channel_id, type, creator_id, scheduled_deletion)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                group_id,
-                str(message_id),
-                str(channel_id),
-                message_type,
-                str(creator_id),
-                deletion_time_str
-            ))
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO group_messages 
+                    (group_id, message_id, channel_id, type, creator_id, scheduled_deletion)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    group_id,
+                    str(message_id),
+                    str(channel_id),
+                    message_type,
+                    str(creator_id),
+                    deletion_time_str
+                ))
             
-            self.conn.commit()
             logger.info(f"Сообщение группы с ID {message_id} сохранено в базе данных (удаление в {deletion_time_str})")
-            return True
+            return deletion_time
         except sqlite3.Error as e:
             logger.error(f"Ошибка сохранения сообщения группы {message_id}: {e}", exc_info=True)
-            return False
+            return None
     
-    def get_messages_to_delete(self):
-        """Получает сообщения, которые пора удалить"""
+    def get_scheduled_messages(self):
+        """
+        Получает все сообщения, ожидающие удаления, в порядке времени удаления
+
+        Returns:
+            Список кортежей (message_id, channel_id, scheduled_deletion)
+        """
         try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            self.cursor.execute('''
-                SELECT group_id, message_id, channel_id
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute('''
+                SELECT message_id, channel_id, scheduled_deletion
                 FROM group_messages
-                WHERE scheduled_deletion <= ?
-            ''', (current_time,))
+                ORDER BY scheduled_deletion
+            ''')
             
-            messages = self.cursor.fetchall()
-            return messages
+            return [tuple(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
-            logger.error(f"Ошибка получения сообщений для удаления: {e}", exc_info=True)
+            logger.error(f"Ошибка получения запланированных к удалению сообщений: {e}", exc_info=True)
             return []
     
-    def delete_message_record(self, message_id):
-        """Удаляет запись о сообщении из базы данных"""
+    def delete_message_records(self, message_ids):
+        """
+        Удаляет записи о нескольких сообщениях одним запросом
+
+        Args:
+            message_ids: Список ID сообщений
+
+        Returns:
+            Количество удаленных записей
+        """
+        if not message_ids:
+            return 0
+        
         try:
-            self.cursor.execute("DELETE FROM group_messages WHERE message_id = ?", (message_id,))
-            self.conn.commit()
-            logger.info(f"Запись о сообщении группы с ID {message_id} удалена из базы данных")
-            return True
+            message_ids = [str(message_id) for message_id in message_ids]
+            deleted = 0
+            
+            with self.pool.transaction() as conn:
+                for start in range(0, len(message_ids), self.MAX_QUERY_PARAMS):
+                    chunk = message_ids[start:start + self.MAX_QUERY_PARAMS]
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor = conn.execute(
+                        f"DELETE FROM group_messages WHERE message_id IN ({placeholders})",
+                        chunk
+                    )
+                    deleted += cursor.rowcount
+            
+            logger.info(f"Удалено {deleted} записей о сообщениях групп из базы данных")
+            return deleted
         except sqlite3.Error as e:
-            logger.error(f"Ошибка удаления записи о сообщении группы {message_id}: {e}", exc_info=True)
-            return False
+            logger.error(f"Ошибка удаления записей о сообщениях групп: {e}", exc_info=True)
+            return 0
     
     def get_group_messages(self, group_id):
         """Получает все сообщения определенной группы"""
         try:
-            self.cursor.execute('''
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute('''
                 SELECT message_id, channel_id, scheduled_deletion
                 FROM group_messages
                 WHERE group_id = ?
             ''', (group_id,))
             
-            messages = self.cursor.fetchall()
+            messages = cursor.fetchall()
             return messages
         except sqlite3.Error as e:
             logger.error(f"Ошибка получения сообщений группы {group_id}: {e}", exc_info=True)
             return []
     
     def close(self):
-        """Закрывает соединение с базой данных"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Соединение с базой данных групп закрыто") 
\ No newline at end of file
+        """Закрывает соединения с базой данных"""
+        self.pool.close_all()
+        logger.info("Соединение с базой данных групп закрыто") 
\ No newline at end of file
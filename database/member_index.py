@@ -0,0 +1,105 @@
+import threading
+
+from tools.logger import Logger
+
+logger = Logger.get_instance()
+
+class MemberRecord:
+    """Компактная запись об участнике сервера"""
+
+    __slots__ = ('id', 'display_name', 'game_static')
+
+    def __init__(self, user_id, display_name, game_static):
+        self.id = user_id
+        self.display_name = display_name
+        self.game_static = game_static
+
+    def __repr__(self):
+        return f"MemberRecord(id={self.id}, display_name={self.display_name!r}, game_static={self.game_static!r})"
+
+class MemberIndex:
+    """
+    Индекс участников сервера в памяти процесса.
+    Хранит соответствия ID участника → запись и игровой статик → записи.
+    Заполняется при синхронизации участников и обновляется при каждом
+    изменении пользователя через UserManager; база данных остается
+    постоянным хранилищем.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = MemberIndex()
+        return cls._instance
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_static = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _add(self, record):
+        """Добавляет запись в индексы (вызывается под блокировкой)"""
+        self._by_id[record.id] = record
+        if record.game_static:
+            self._by_static.setdefault(record.game_static, {})[record.id] = record
+
+    def _discard(self, user_id):
+        """Удаляет запись из индексов (вызывается под блокировкой)"""
+        record = self._by_id.pop(user_id, None)
+        if record and record.game_static:
+            records = self._by_static.get(record.game_static)
+            if records is not None:
+                records.pop(user_id, None)
+                if not records:
+                    del self._by_static[record.game_static]
+        return record
+
+    def load(self, records):
+        """
+        Полностью перестраивает индекс
+
+        Args:
+            records: Итерируемый набор MemberRecord
+        """
+        with self._lock:
+            self._by_id = {}
+            self._by_static = {}
+            for record in records:
+                self._add(record)
+            self.loaded = True
+
+        logger.info(f"Индекс участников построен: {len(self._by_id)} записей")
+
+    def upsert(self, user_id, display_name, game_static):
+        """Добавляет или обновляет запись об участнике"""
+        with self._lock:
+            self._discard(user_id)
+            self._add(MemberRecord(user_id, display_name, game_static))
+
+    def remove(self, user_id):
+        """Удаляет запись об участнике"""
+        with self._lock:
+            return self._discard(user_id) is not None
+
+    def find_by_statics(self, game_statics):
+        """
+        Возвращает записи участников для списка статиков
+
+        Args:
+            game_statics: Список игровых статиков
+
+        Returns:
+            Словарь {статик: список MemberRecord}
+        """
+        with self._lock:
+            return {
+                static: list(self._by_static.get(static, {}).values())
+                for static in game_statics
+            }
+
+    def __len__(self):
+        return len(self._by_id)
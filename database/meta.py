@@ -0,0 +1,59 @@
+import sqlite3
+
+from tools.logger import Logger
+from database.storage import Storage
+
+logger = Logger.get_instance()
+
+class MetaDatabase:
+    """Класс для хранения служебных значений бота (ключ — значение)"""
+    
+    _instance = None
+    
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = MetaDatabase()
+        return cls._instance
+    
+    def __init__(self, db_file=None):
+        """Подключение к единому хранилищу (таблицы создаются миграциями)"""
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
+    
+    def get_value(self, key):
+        """
+        Получает служебное значение
+
+        Args:
+            key: Ключ
+
+        Returns:
+            Строковое значение или None, если значение не сохранялось
+        """
+        try:
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute("SELECT value FROM bot_meta WHERE key = ?", (key,))
+            row = cursor.fetchone()
+            return row['value'] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка получения служебного значения {key}: {e}", exc_info=True)
+            return None
+    
+    def set_value(self, key, value):
+        """Сохраняет служебное значение"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO bot_meta (key, value)
+                    VALUES (?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        value = excluded.value,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (key, str(value)))
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения служебного значения {key}: {e}", exc_info=True)
+            return False
@@ -0,0 +1,68 @@
+import sqlite3
+
+from tools.logger import Logger
+from database.storage import Storage
+
+logger = Logger.get_instance()
+
+class PanelDatabase:
+    """Класс для хранения ID сообщений опубликованных панелей с кнопками"""
+    
+    _instance = None
+    
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = PanelDatabase()
+        return cls._instance
+    
+    def __init__(self, db_file=None):
+        """Подключение к единому хранилищу (таблицы создаются миграциями)"""
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
+    
+    def get_panel(self, name):
+        """
+        Получает опубликованную панель по имени
+
+        Args:
+            name: Имя панели
+
+        Returns:
+            Словарь с channel_id и message_id или None, если панель не публиковалась
+        """
+        try:
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute("SELECT channel_id, message_id FROM panels WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            return {
+                'channel_id': int(row['channel_id']),
+                'message_id': int(row['message_id'])
+            }
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка получения панели {name}: {e}", exc_info=True)
+            return None
+    
+    def save_panel(self, name, channel_id, message_id):
+        """Сохраняет ID сообщения панели"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO panels (name, channel_id, message_id)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        channel_id = excluded.channel_id,
+                        message_id = excluded.message_id,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (name, str(channel_id), str(message_id)))
+            
+            logger.info(f"Панель {name} сохранена (сообщение {message_id} в канале {channel_id})")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения панели {name}: {e}", exc_info=True)
+            return False
@@ -0,0 +1,356 @@
+import os
+import sqlite3
+import threading
+
+from tools.logger import Logger
+from database.connection import ConnectionPool
+
+logger = Logger.get_instance()
+
+# Единый файл базы данных бота
+DB_PATH = os.getenv('DATABASE_PATH', 'database/bot.db')
+
+# Размер страничного кэша SQLite на одно соединение (в килобайтах)
+CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))
+
+# Настройки соединений: WAL позволяет читателям работать параллельно с писателем,
+# а synchronous=NORMAL в режиме WAL сохраняет целостность без fsync на каждую транзакцию
+PRAGMAS = (
+    "journal_mode = WAL",
+    "synchronous = NORMAL",
+    f"cache_size = -{CACHE_SIZE_KB}",
+    "temp_store = MEMORY",
+    "busy_timeout = 5000",
+)
+
+# Отдельные файлы баз данных, использовавшиеся до объединения, и их таблицы
+LEGACY_DATABASES = (
+    ("database/reactions.db", ("reaction_buttons", "reaction_logs", "submissions")),
+    ("database/user.db", ("users",)),
+    ("database/capt.db", ("capts", "participants")),
+    ("database/group.db", ("group_messages",)),
+)
+
+def _migration_initial_schema(conn):
+    """Базовая схема всех таблиц бота"""
+    # Кнопки реакций под заявками
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reaction_buttons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            approve_button_id TEXT NOT NULL,
+            reject_button_id TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            author_id TEXT,
+            submission_id INTEGER
+        )
+    ''')
+
+    # Логи действий с кнопками
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reaction_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            reason TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Заявки (жалобы, предложения, запросы и повышения)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            author_id TEXT NOT NULL,
+            order_id TEXT,
+            order_price TEXT,
+            current_rank INTEGER,
+            next_rank INTEGER,
+            data TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            moderator_id TEXT,
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            decided_at TIMESTAMP
+        )
+    ''')
+
+    # Пользователи сервера
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            display_name TEXT NOT NULL,
+            game_static TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Сборы и их участники
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS capts (
+            message_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            creator_id TEXT NOT NULL,
+            creator_name TEXT NOT NULL,
+            datetime TEXT NOT NULL,
+            slots INTEGER NOT NULL,
+            guild_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            thread_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            user_name TEXT NOT NULL,
+            is_extra BOOLEAN NOT NULL DEFAULT 0,
+            FOREIGN KEY (message_id) REFERENCES capts (message_id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Сообщения групп с запланированным удалением
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS group_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_id TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            creator_id TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            scheduled_deletion TIMESTAMP NOT NULL
+        )
+    ''')
+
+    # Индексы
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reaction_buttons_approve ON reaction_buttons (approve_button_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reaction_buttons_reject ON reaction_buttons (reject_button_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_author ON submissions (author_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_game_static ON users (game_static)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_participants_message ON participants (message_id)")
+
+def _migration_import_legacy(conn):
+    """Перенос данных из отдельных файлов баз данных в единый файл"""
+    # ATTACH невозможен внутри открытой транзакции, поэтому перенос каждого файла
+    # фиксируется отдельно (повторный перенос безопасен благодаря INSERT OR IGNORE)
+    conn.execute("COMMIT")
+    try:
+        for legacy_file, tables in LEGACY_DATABASES:
+            if os.path.exists(legacy_file):
+                _import_legacy_file(conn, legacy_file, tables)
+    finally:
+        # Возобновляем транзакцию миграции для записи версии схемы
+        conn.execute("BEGIN")
+
+def _import_legacy_file(conn, legacy_file, tables):
+    """Переносит таблицы одного старого файла базы данных в отдельной транзакции"""
+    conn.execute("ATTACH DATABASE ? AS legacy", (legacy_file,))
+    try:
+        conn.execute("BEGIN")
+        for table in tables:
+            exists = conn.execute(
+                "SELECT 1 FROM legacy.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if not exists:
+                continue
+
+            # Копируем только общие колонки: в старых файлах часть полей могла отсутствовать
+            target_columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            legacy_columns = {row[1] for row in conn.execute(f"PRAGMA legacy.table_info({table})")}
+            columns = ", ".join(column for column in target_columns if column in legacy_columns)
+
+            # Строки без родительской записи (например, участники удаленного сбора)
+            # нарушили бы внешний ключ, поэтому пропускаем их
+            conditions = [
+                f"({child} IS NULL OR {child} IN (SELECT {parent_column} FROM main.{parent}))"
+                for _, _, parent, child, parent_column, *_ in conn.execute(f"PRAGMA main.foreign_key_list({table})")
+                if child in legacy_columns
+            ]
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            total = conn.execute(f"SELECT COUNT(*) FROM legacy.{table}").fetchone()[0]
+            skipped = total - conn.execute(f"SELECT COUNT(*) FROM legacy.{table}{where}").fetchone()[0]
+
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM legacy.{table}{where}"
+            )
+            logger.info(f"Перенесено {cursor.rowcount} из {total} записей таблицы {table} из {legacy_file}")
+            if skipped:
+                logger.warning(f"Пропущено {skipped} записей таблицы {table} из {legacy_file} без родительской записи")
+
+        conn.execute("COMMIT")
+    except Exception:
+        # Откатываем незавершенный перенос: DETACH невозможен при открытой транзакции
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("DETACH DATABASE legacy")
+
+def _migration_participant_positions(conn):
+    """Позиция участника в списке и уникальность участника в сборе"""
+    conn.execute("ALTER TABLE participants ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+
+    # Убираем возможные дубликаты, оставляя самую раннюю запись
+    conn.execute('''
+        DELETE FROM participants
+        WHERE id NOT IN (SELECT MIN(id) FROM participants GROUP BY message_id, user_id)
+    ''')
+
+    # Позиции существующих участников восстанавливаем по порядку добавления
+    conn.execute('''
+        UPDATE participants SET position = (
+            SELECT COUNT(*) FROM participants AS earlier
+            WHERE earlier.message_id = participants.message_id
+              AND earlier.is_extra = participants.is_extra
+              AND earlier.id < participants.id
+        )
+    ''')
+
+    conn.execute("DROP INDEX IF EXISTS idx_participants_message")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_member ON participants (message_id, user_id)")
+
+def _migration_group_deletion_index(conn):
+    """Индекс по времени удаления сообщений групп"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_group_messages_deletion ON group_messages (scheduled_deletion)")
+
+def _migration_panels(conn):
+    """Таблица опубликованных панелей с кнопками"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS panels (
+            name TEXT PRIMARY KEY,
+            channel_id TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_meta(conn):
+    """Служебная таблица «ключ — значение» (например, хэш дерева команд)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_participant_records(conn):
+    """Ранг участника и время присоединения (для восстановления сборов без кэша участников)"""
+    conn.execute("ALTER TABLE participants ADD COLUMN rank INTEGER")
+    conn.execute("ALTER TABLE participants ADD COLUMN joined_at TIMESTAMP")
+
+# Упорядоченный список миграций: (версия, описание, функция)
+MIGRATIONS = [
+    (1, "Базовая схема", _migration_initial_schema),
+    (2, "Перенос данных из отдельных файлов баз данных", _migration_import_legacy),
+    (3, "Позиции участников сборов", _migration_participant_positions),
+    (4, "Индекс времени удаления сообщений групп", _migration_group_deletion_index),
+    (5, "Панели с кнопками", _migration_panels),
+    (6, "Служебные значения бота", _migration_meta),
+    (7, "Ранг и время присоединения участников сборов", _migration_participant_records),
+]
+
+class Storage:
+    """
+    Единое хранилище бота.
+    Все таблицы находятся в одном файле SQLite в режиме WAL, а схема
+    поддерживается упорядоченными миграциями с учетом версии в таблице
+    schema_version.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, db_file=None):
+        """
+        Получение хранилища для файла базы данных
+
+        Args:
+            db_file: Путь к файлу базы данных (по умолчанию DATABASE_PATH или database/bot.db)
+
+        Returns:
+            Экземпляр хранилища с примененными миграциями
+        """
+        db_file = db_file or DB_PATH
+        with cls._instances_lock:
+            storage = cls._instances.get(db_file)
+            if storage is None:
+                storage = cls(db_file)
+                cls._instances[db_file] = storage
+            return storage
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.pool = ConnectionPool.get_instance(db_file, PRAGMAS)
+
+        self.migrate()
+
+    def get_version(self):
+        """Возвращает текущую версию схемы базы данных"""
+        conn = self.pool.get_connection()
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return row[0] or 0
+
+    def migrate(self):
+        """Применяет к базе данных все еще не выполненные миграции по порядку"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+            current_version = self.get_version()
+
+            conn = self.pool.get_connection()
+            # Модуль sqlite3 неявно открывает транзакцию только перед INSERT/UPDATE/DELETE,
+            # и ALTER TABLE в начале миграции фиксировался сразу. Поэтому каждая миграция
+            # выполняется в явной транзакции BEGIN/COMMIT вместе с записью своей версии
+            # и при сбое откатывается целиком
+            isolation_level = conn.isolation_level
+            conn.isolation_level = None
+            try:
+                for version, description, migration in MIGRATIONS:
+                    if version <= current_version:
+                        continue
+
+                    conn.execute("BEGIN")
+                    try:
+                        migration(conn)
+                        conn.execute(
+                            "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                            (version, description)
+                        )
+                        conn.execute("COMMIT")
+                    except Exception:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                        raise
+
+                    current_version = version
+                    logger.info(f"Применена миграция базы данных {version}: {description}")
+            finally:
+                conn.isolation_level = isolation_level
+
+            logger.info(f"База данных инициализирована: {self.db_file} (версия схемы {current_version})")
+        except sqlite3.Error as e:
+            # Работа со схемой, для которой не применены миграции, недопустима: останавливаем запуск
+            logger.critical(f"Ошибка при применении миграций базы данных: {e}", exc_info=True)
+            raise
@@ -1,8 +1,9 @@
 import sqlite3
-import os
-import discord
 import re
+import time
 from tools.logger import Logger
+from database.storage import Storage
+from database.member_index import MemberIndex, MemberRecord
 
 logger = Logger.get_instance()
 
@@ -12,48 +13,14 @@ class UserManager:
     Сохраняет информацию о пользователях сервера (id и отображаемое имя).
     """
 
-    def __init__(self, db_file="database/user.db"):
-        self.db_file = db_file
-        self.conn = None
+    # Максимальное количество параметров в одном запросе
+    MAX_QUERY_PARAMS = 500
 
-        os.makedirs(os.path.dirname(db_file), exist_ok=True)
-
-        self._init_db()
-
-    def _init_db(self):
-        """Инициализация базы данных и создание необходимых таблиц"""
-        try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
-
-            # Проверяем существует ли таблица пользователей
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-            table_exists = cursor.fetchone()
-
-            if not table_exists:
-                # Создаем таблицу для хранения данных о пользователях
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY,
-                        display_name TEXT NOT NULL,
-                        game_static TEXT,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                logger.info("Создана новая таблица пользователей с полем game_static")
-            else:
-                # Проверяем, есть ли колонка game_static, и если нет, добавляем ее
-                cursor.execute("PRAGMA table_info(users)")
-                columns = [column[1] for column in cursor.fetchall()]
-                
-                if "game_static" not in columns:
-                    cursor.execute("ALTER TABLE users ADD COLUMN game_static TEXT")
-                    logger.info("В существующую таблицу пользователей добавлено поле game_static")
-
-            self.conn.commit()
-            logger.info(f"База данных пользователей инициализирована: {self.db_file}")
-        except sqlite3.Error as e:
-            logger.error(f"Ошибка при инициализации базы данных пользователей: {e}", exc_info=True)
+    def __init__(self, db_file=None):
+        storage = Storage.get_instance(db_file)
+        self.db_file = storage.db_file
+        self.pool = storage.pool
+        self.index = MemberIndex.get_instance()
 
     def extract_game_static(self, display_name: str) -> str:
         """
@@ -109,37 +76,34 @@ class UserManager:
             # Извлекаем игровой статик из отображаемого имени
             game_static = self.extract_game_static(display_name)
             
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
-
-            # Проверяем существует ли уже пользователь
-            cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-            exists = cursor.fetchone()
-
-            if exists:
-                # Обновляем существующего пользователя
-                cursor.execute('''
-                    UPDATE users 
-                    SET display_name = ?, game_static = ?, updated_at = CURRENT_TIMESTAMP 
-                    WHERE id = ?
-                ''', (display_name, game_static, user_id))
-                logger.info(f"Обновлен пользователь {display_name} (ID: {user_id}, Статик: {game_static})")
-            else:
-                # Добавляем нового пользователя
-                cursor.execute('''
-                    INSERT INTO users (id, display_name, game_static) 
-                    VALUES (?, ?, ?)
-                ''', (user_id, display_name, game_static))
-                logger.info(f"Добавлен новый пользователь {display_name} (ID: {user_id}, Статик: {game_static})")
-
-            self.conn.commit()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+
+                # Проверяем существует ли уже пользователь
+                cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
+                exists = cursor.fetchone()
+
+                if exists:
+                    # Обновляем существующего пользователя
+                    cursor.execute('''
+                        UPDATE users 
+                        SET display_name = ?, game_static = ?, updated_at = CURRENT_TIMESTAMP 
+                        WHERE id = ?
+                    ''', (display_name, game_static, user_id))
+                    logger.info(f"Обновлен пользователь {display_name} (ID: {user_id}, Статик: {game_static})")
+                else:
+                    # Добавляем нового пользователя
+                    cursor.execute('''
+                        INSERT INTO users (id, display_name, game_static) 
+                        VALUES (?, ?, ?)
+                    ''', (user_id, display_name, game_static))
+                    logger.info(f"Добавлен новый пользователь {display_name} (ID: {user_id}, Статик: {game_static})")
+
+            self.index.upsert(user_id, display_name, game_static)
             return True
         except sqlite3.Error as e:
             logger.error(f"Ошибка при обновлении пользователя {display_name} (ID: {user_id}): {e}", exc_info=True)
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def get_user(self, user_id: int):
         """
@@ -152,9 +116,8 @@ class UserManager:
             Словарь с информацией о пользователе или None, если пользователь не найден
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('''
                 SELECT id, display_name, game_static, updated_at 
@@ -178,9 +141,6 @@ class UserManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении информации о пользователе {user_id}: {e}", exc_info=True)
             return None
-        finally:
-            if self.conn:
-                self.conn.close()
 
     def get_user_by_game_static(self, game_static: str):
         """
@@ -193,9 +153,8 @@ class UserManager:
             Список словарей с информацией о пользователях с указанным статиком
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('''
                 SELECT id, display_name, game_static, updated_at 
@@ -218,9 +177,46 @@ class UserManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении пользователей по статику {game_static}: {e}", exc_info=True)
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
+
+    def get_users_by_game_statics(self, game_statics):
+        """
+        Получение информации о пользователях по списку игровых статиков одним запросом
+
+        Args:
+            game_statics: Список игровых статиков
+
+        Returns:
+            Словарь {статик: список словарей с информацией о пользователях}
+        """
+        statics = list(dict.fromkeys(game_statics))
+        result = {static: [] for static in statics}
+
+        try:
+            conn = self.pool.get_connection()
+
+            # Разбиваем список на части, чтобы не превысить лимит параметров SQLite
+            for i in range(0, len(statics), self.MAX_QUERY_PARAMS):
+                chunk = statics[i:i + self.MAX_QUERY_PARAMS]
+                placeholders = ', '.join('?' for _ in chunk)
+
+                cursor = conn.execute(f'''
+                    SELECT id, display_name, game_static, updated_at 
+                    FROM users 
+                    WHERE game_static IN ({placeholders})
+                ''', chunk)
+
+                for row in cursor.fetchall():
+                    result[row['game_static']].append({
+                        'id': row['id'],
+                        'display_name': row['display_name'],
+                        'game_static': row['game_static'],
+                        'updated_at': row['updated_at']
+                    })
+
+            return result
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при получении пользователей по списку статиков: {e}", exc_info=True)
+            return result
 
     def get_all_users(self):
         """
@@ -230,9 +226,8 @@ class UserManager:
             Список словарей с информацией о пользователях
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row
-            cursor = self.conn.cursor()
+            conn = self.pool.get_connection()
+            cursor = conn.cursor()
 
             cursor.execute('SELECT id, display_name, game_static, updated_at FROM users')
             rows = cursor.fetchall()
@@ -251,62 +246,105 @@ class UserManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении информации о пользователях: {e}", exc_info=True)
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
 
-    def sync_guild_members(self, guild: discord.Guild):
+    @staticmethod
+    def snapshot_guilds(guilds):
         """
-        Синхронизирует базу данных с текущими пользователями на сервере
+        Общий снимок участников всех серверов бота для синхронизации.
+        Таблица пользователей общая, поэтому синхронизировать ее нужно одним
+        снимком: иначе синхронизация каждого сервера удалит участников остальных.
+
+        Снимок считается полным, только если все серверы доступны и кэш участников
+        каждого из них загружен целиком (после переподключения он может быть неполным).
 
         Args:
-            guild: Объект сервера Discord
+            guilds: Список серверов Discord
 
         Returns:
-            Кортеж (добавлено, обновлено) с количеством добавленных и обновленных пользователей
+            Кортеж (список кортежей (ID пользователя, отображаемое имя) без повторов, снимок полный)
         """
-        try:
-            added = 0
-            updated = 0
-            
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
-            
-            # Получаем существующих пользователей из базы
-            cursor.execute('SELECT id FROM users')
-            existing_users = {row[0] for row in cursor.fetchall()}
-            
-            # Добавляем/обновляем пользователей
+        members = {}
+        complete = True
+        for guild in guilds:
+            if guild.unavailable or guild.member_count is None or len(guild.members) < guild.member_count:
+                logger.warning(f"Участники сервера {guild.id} загружены не полностью, удаление пользователей пропускается")
+                complete = False
             for member in guild.members:
-                user_id = member.id
-                display_name = member.display_name
-                game_static = self.extract_game_static(display_name)
-                
-                if user_id in existing_users:
-                    # Обновляем существующего пользователя
-                    cursor.execute('''
-                        UPDATE users 
-                        SET display_name = ?, game_static = ?, updated_at = CURRENT_TIMESTAMP 
-                        WHERE id = ?
-                    ''', (display_name, game_static, user_id))
-                    updated += 1
-                else:
-                    # Добавляем нового пользователя
-                    cursor.execute('''
-                        INSERT INTO users (id, display_name, game_static) 
+                members.setdefault(member.id, member.display_name)
+        return list(members.items()), complete
+
+    def sync_members(self, members, complete=True):
+        """
+        Синхронизирует базу данных со снимком участников всех серверов.
+        Сравнивает снимок с текущим содержимым таблицы и записывает
+        только изменившиеся строки одной транзакцией. Пользователи,
+        отсутствующие в полном снимке, удаляются (см. snapshot_guilds);
+        по неполному или пустому снимку пользователи не удаляются.
+
+        Args:
+            members: Список кортежей (ID пользователя, отображаемое имя)
+            complete: Снимок содержит всех участников всех серверов
+
+        Returns:
+            Кортеж (добавлено, обновлено, удалено, время в секундах)
+        """
+        started_at = time.perf_counter()
+
+        try:
+            conn = self.pool.get_connection()
+
+            # Получаем текущий снимок пользователей из базы
+            existing_users = {row[0]: row[1] for row in conn.execute('SELECT id, display_name FROM users')}
+            current_users = dict(members)
+
+            # Вычисляем разницу в памяти
+            to_add = []
+            to_update = []
+            for user_id, display_name in current_users.items():
+                if user_id not in existing_users:
+                    to_add.append((user_id, display_name, self.extract_game_static(display_name)))
+                elif existing_users[user_id] != display_name:
+                    to_update.append((user_id, display_name, self.extract_game_static(display_name)))
+
+            # Неполный или пустой снимок (сервер недоступен, кэш участников не загружен)
+            # не означает, что пользователи покинули сервер
+            to_remove = []
+            if complete and current_users:
+                to_remove = [(user_id,) for user_id in existing_users if user_id not in current_users]
+
+            # Записываем только изменившиеся строки
+            with self.pool.transaction() as conn:
+                if to_add or to_update:
+                    conn.executemany('''
+                        INSERT INTO users (id, display_name, game_static)
                         VALUES (?, ?, ?)
-                    ''', (user_id, display_name, game_static))
-                    added += 1
-            
-            self.conn.commit()
-            logger.info(f"Синхронизация пользователей: добавлено {added}, обновлено {updated}")
-            return (added, updated)
+                        ON CONFLICT(id) DO UPDATE SET
+                            display_name = excluded.display_name,
+                            game_static = excluded.game_static,
+                            updated_at = CURRENT_TIMESTAMP
+                    ''', to_add + to_update)
+
+                if to_remove:
+                    conn.executemany('DELETE FROM users WHERE id = ?', to_remove)
+
+            # Перестраиваем индекс участников в памяти (вместе с неудаленными пользователями)
+            removed_ids = {user_id for user_id, in to_remove}
+            indexed_users = {user_id: name for user_id, name in existing_users.items() if user_id not in removed_ids}
+            indexed_users.update(current_users)
+            self.index.load(
+                MemberRecord(user_id, display_name, self.extract_game_static(display_name))
+                for user_id, display_name in indexed_users.items()
+            )
+
+            elapsed = time.perf_counter() - started_at
+            logger.info(
+                f"Синхронизация пользователей: добавлено {len(to_add)}, обновлено {len(to_update)}, "
+                f"удалено {len(to_remove)} за {elapsed:.3f} с"
+            )
+            return (len(to_add), len(to_update), len(to_remove), elapsed)
         except sqlite3.Error as e:
             logger.error(f"Ошибка при синхронизации пользователей: {e}", exc_info=True)
-            return (0, 0)
-        finally:
-            if self.conn:
-                self.conn.close()
+            return (0, 0, 0, time.perf_counter() - started_at)
 
     def delete_user(self, user_id: int):
         """
@@ -319,11 +357,10 @@ class UserManager:
             True, если удаление прошло успешно, иначе False
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            cursor = self.conn.cursor()
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
 
-            cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
-            self.conn.commit()
+            self.index.remove(user_id)
             
             if cursor.rowcount > 0:
                 logger.info(f"Пользователь с ID {user_id} удален из базы данных")
@@ -334,17 +371,14 @@ class UserManager:
         except sqlite3.Error as e:
             logger.error(f"Ошибка при удалении пользователя {user_id}: {e}", exc_info=True)
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
 
     @classmethod
-    def get_instance(cls, db_file="database/user.db"):
+    def get_instance(cls, db_file=None):
         """
         Получение глобального экземпляра менеджера базы данных пользователей
 
         Args:
-            db_file: Путь к файлу базы данных
+            db_file: Путь к файлу базы данных (по умолчанию единый файл хранилища)
 
         Returns:
             Экземпляр менеджера базы данных пользователей
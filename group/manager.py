@@ -1,11 +1,14 @@
 import os
 import discord
-from discord.ext import tasks
-from datetime import datetime, timezone, timedelta
+import heapq
+from datetime import datetime, timedelta
 import asyncio
 
 from tools.logger import Logger
 from database.group import GroupDatabase
+from database.async_db import AsyncDatabase
+from tools.message_ops import MessageOps
+from tools.dispatcher import Dispatcher
 
 logger = Logger.get_instance()
 
@@ -14,6 +17,12 @@ class GroupManager:
     
     _instance = None
     
+    # Максимальное количество сообщений в одном запросе массового удаления
+    BULK_DELETE_LIMIT = 100
+    # Задержка повторного удаления после ошибки (удваивается с каждой попыткой), в секундах
+    RETRY_DELAY = 60
+    RETRY_MAX_DELAY = 3600
+    
     @classmethod
     def get_instance(cls):
         """Получение единственного экземпляра класса (Singleton)"""
@@ -27,6 +36,14 @@ class GroupManager:
         self.group_channel_id = None
         self.log_channel_id = None
         
+        # Очередь удаления сообщений: куча (время удаления, ID сообщения, ID канала)
+        self._deadlines = []
+        self._scheduled = set()
+        # Количество неудачных попыток удаления: {ID сообщения: попытки}
+        self._retries = {}
+        self._wakeup = asyncio.Event()
+        self._scheduler_task = None
+        
         # Загружаем ID каналов из переменных окружения
         self.load_env_vars()
         
@@ -45,14 +62,16 @@ class GroupManager:
         """Настройка менеджера с ботом"""
         self.bot = bot
         
-        # Запускаем задачи по расписанию
-        self.check_messages_to_delete.start()
+        # Запускаем планировщик удаления сообщений
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_task = asyncio.create_task(self.run_deletion_scheduler())
         
         logger.info("Менеджер групп успешно инициализирован")
     
     def cog_unload(self):
         """Остановка задач при выгрузке модуля"""
-        self.check_messages_to_delete.cancel()
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
     
     async def log_group_creation(self, user, group_type, time):
         """Логирование создания группы в лог-канал"""
@@ -67,58 +86,193 @@ class GroupManager:
                 return
             
             # Отправляем сообщение в лог-канал
-            await log_channel.send(f"{user.display_name} запустил групп на {group_type} в {time}")
+            await Dispatcher.get_instance().submit(
+                Dispatcher.channel_route(log_channel),
+                log_channel.send,
+                f"{user.display_name} запустил групп на {group_type} в {time}",
+                priority=Dispatcher.PRIORITY_LOG
+            )
             
         except Exception as e:
             logger.error(f"Ошибка при логировании создания группы: {e}", exc_info=True)
     
-    @tasks.loop(seconds=30)
-    async def check_messages_to_delete(self):
-        """Проверяет сообщения, которые нужно удалить"""
-        try:
-            if not self.bot:
-                return
-            
-            # Получаем сообщения для удаления из базы данных
-            db = GroupDatabase.get_instance()
-            messages_to_delete = db.get_messages_to_delete()
-            
-            if not messages_to_delete:
-                return
+    async def register_message(self, group_id, message, message_type, creator_id, minutes_to_delete=5):
+        """
+        Сохраняет сообщение группы в базу данных и планирует его удаление
+
+        Args:
+            group_id: ID группы сообщений
+            message: Отправленное сообщение Discord
+            message_type: Тип группы или название мероприятия
+            creator_id: ID пользователя, создавшего группу
+            minutes_to_delete: Через сколько минут удалить сообщение
+        """
+        db = GroupDatabase.get_instance()
+        deletion_time = await AsyncDatabase.get_instance().write(
+            db.save_message,
+            group_id=group_id,
+            message_id=message.id,
+            channel_id=message.channel.id,
+            message_type=message_type,
+            creator_id=creator_id,
+            minutes_to_delete=minutes_to_delete
+        )
+        
+        if deletion_time:
+            self.schedule_deletion(message.id, message.channel.id, deletion_time)
+    
+    def schedule_deletion(self, message_id, channel_id, deletion_time):
+        """
+        Добавляет сообщение в очередь удаления
+
+        Args:
+            message_id: ID сообщения
+            channel_id: ID канала сообщения
+            deletion_time: Время удаления (datetime без часового пояса, локальное время)
+        """
+        message_id = str(message_id)
+        if message_id in self._scheduled:
+            return
+        
+        self._scheduled.add(message_id)
+        heapq.heappush(self._deadlines, (deletion_time, message_id, str(channel_id)))
+        
+        # Будим планировщик, если новое сообщение нужно удалить раньше текущего ожидания
+        self._wakeup.set()
+    
+    async def load_scheduled_messages(self):
+        """Загружает из базы данных сообщения, ожидающие удаления"""
+        db = GroupDatabase.get_instance()
+        rows = await AsyncDatabase.get_instance().read(db.get_scheduled_messages)
+        
+        for message_id, channel_id, scheduled_deletion in rows:
+            deletion_time = datetime.strptime(scheduled_deletion, "%Y-%m-%d %H:%M:%S")
+            self.schedule_deletion(message_id, channel_id, deletion_time)
+        
+        logger.info(f"Загружено {len(rows)} сообщений групп, ожидающих удаления")
+    
+    async def run_deletion_scheduler(self):
+        """Ожидает ближайшего времени удаления и удаляет сообщения, срок которых истек"""
+        await self.bot.wait_until_ready()
+        await self.load_scheduled_messages()
+        
+        while True:
+            try:
+                self._wakeup.clear()
+                
+                if not self._deadlines:
+                    await self._wakeup.wait()
+                    continue
+                
+                delay = (self._deadlines[0][0] - datetime.now()).total_seconds()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                # Забираем все сообщения, срок удаления которых уже наступил
+                now = datetime.now()
+                due_messages = []
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, message_id, channel_id = heapq.heappop(self._deadlines)
+                    self._scheduled.discard(message_id)
+                    due_messages.append((message_id, channel_id))
+                
+                await self.delete_messages(due_messages)
             
-            logger.info(f"Найдено {len(messages_to_delete)} сообщений для удаления")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка в планировщике удаления сообщений групп: {e}", exc_info=True)
+    
+    async def delete_messages(self, messages_to_delete):
+        """
+        Удаляет сообщения групп и записи о них из базы данных.
+        Сообщения группируются по каналам и удаляются массово (до 100 за запрос)
+        без предварительного получения. Записи удаляются одним запросом к базе
+        только для удаленных (или уже отсутствующих) сообщений; остальные
+        остаются в базе и снова ставятся в очередь удаления с нарастающей задержкой.
+        """
+        # Группируем сообщения по каналам
+        by_channel = {}
+        for message_id, channel_id in messages_to_delete:
+            by_channel.setdefault(int(channel_id), []).append(message_id)
+        
+        api_calls = 0
+        deleted_ids = []
+        
+        for channel_id, message_ids in by_channel.items():
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                logger.warning(f"Канал с ID {channel_id} не найден, удаляем записи из БД")
+                deleted_ids.extend(message_ids)
+                continue
             
-            for group_id, message_id, channel_id in messages_to_delete:
+            for start in range(0, len(message_ids), self.BULK_DELETE_LIMIT):
+                chunk = message_ids[start:start + self.BULK_DELETE_LIMIT]
                 try:
-                    # Преобразуем ID канала и сообщения в int
-                    channel_id_int = int(channel_id)
-                    message_id_int = int(message_id)
-                    
-                    # Получаем канал
-                    channel = self.bot.get_channel(channel_id_int)
-                    if not channel:
-                        logger.warning(f"Канал с ID {channel_id} не найден, удаляем запись из БД")
-                        db.delete_message_record(message_id)
-                        continue
-                    
-                    # Получаем сообщение
-                    try:
-                        message = await channel.fetch_message(message_id_int)
-                        # Удаляем сообщение
-                        await message.delete()
-                        logger.info(f"Сообщение с ID {message_id} успешно удалено")
-                    except discord.NotFound:
-                        logger.warning(f"Сообщение с ID {message_id} не найдено, удаляем запись из БД")
-                    except discord.Forbidden:
-                        logger.warning(f"Недостаточно прав для удаления сообщения с ID {message_id}")
-                    except Exception as e:
-                        logger.error(f"Ошибка при удалении сообщения с ID {message_id}: {e}", exc_info=True)
-                    
-                    # Удаляем запись из базы данных
-                    db.delete_message_record(message_id)
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка при обработке сообщения {message_id}: {e}", exc_info=True)
-            
-        except Exception as e:
-            logger.error(f"Ошибка при проверке сообщений для удаления: {e}", exc_info=True)
\ No newline at end of file
+                    api_calls += 1
+                    await channel.delete_messages([discord.Object(id=int(message_id)) for message_id in chunk])
+                    deleted_ids.extend(chunk)
+                except discord.Forbidden:
+                    # Без права управления сообщениями бот может удалить только свои сообщения
+                    logger.warning(f"Недостаточно прав для массового удаления сообщений в канале {channel_id}")
+                    api_calls += len(chunk)
+                    deleted_ids.extend(await self._delete_one_by_one(channel, chunk))
+                except discord.HTTPException as e:
+                    # Массовое удаление отклоняется целиком (например, если одно из сообщений
+                    # уже удалено), поэтому удаляем сообщения пачки по одному
+                    logger.warning(f"Не удалось массово удалить сообщения в канале {channel_id}: {e}")
+                    api_calls += len(chunk)
+                    deleted_ids.extend(await self._delete_one_by_one(channel, chunk))
+        
+        # Сообщения, которые не удалось удалить, повторяем позже
+        deleted = set(deleted_ids)
+        failed = [(message_id, channel_id) for message_id, channel_id in messages_to_delete if message_id not in deleted]
+        for message_id in deleted:
+            self._retries.pop(message_id, None)
+        self.schedule_retries(failed)
+        
+        # Удаляем записи из базы данных одним запросом
+        if deleted_ids:
+            db = GroupDatabase.get_instance()
+            await AsyncDatabase.get_instance().write(db.delete_message_records, deleted_ids)
+        
+        logger.info(
+            f"Удалено {len(deleted_ids)} из {len(messages_to_delete)} сообщений групп в {len(by_channel)} каналах, "
+            f"запросов к API: {api_calls}"
+        )
+    
+    def schedule_retries(self, messages):
+        """
+        Возвращает в очередь удаления сообщения, которые не удалось удалить.
+        Задержка удваивается с каждой неудачной попыткой (от RETRY_DELAY до RETRY_MAX_DELAY).
+
+        Args:
+            messages: Список кортежей (ID сообщения, ID канала)
+        """
+        for message_id, channel_id in messages:
+            attempts = self._retries.get(message_id, 0)
+            self._retries[message_id] = attempts + 1
+            delay = min(self.RETRY_DELAY * 2 ** attempts, self.RETRY_MAX_DELAY)
+            self.schedule_deletion(message_id, channel_id, datetime.now() + timedelta(seconds=delay))
+        
+        if messages:
+            logger.warning(f"Повторное удаление {len(messages)} сообщений групп запланировано позже")
+    
+    async def _delete_one_by_one(self, channel, message_ids):
+        """
+        Удаляет сообщения по одному без предварительного получения
+
+        Returns:
+            Список ID сообщений, которые удалены или уже отсутствуют
+        """
+        deleted_ids = []
+        for message_id in message_ids:
+            # False — сообщение уже удалено, None — ошибка (запись остается в базе)
+            if await MessageOps.delete(channel, message_id) is not None:
+                deleted_ids.append(message_id)
+        
+        return deleted_ids
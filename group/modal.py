@@ -1,4 +1,5 @@
 import discord
+import asyncio
 from discord import ui
 import re
 import os
@@ -6,13 +7,43 @@ import uuid
 from datetime import datetime, timezone, timedelta
 
 from tools.logger import Logger
-from database.group import GroupDatabase
+from group.manager import GroupManager
+from tools.dispatcher import Dispatcher
 
 logger = Logger.get_instance()
 
 # Получаем ID роли Rave из переменных окружения
 RAVE_ROLE_ID = int(os.getenv('RAVE_ROLE', 0))
 
+# Количество сообщений-пингов в одной группе
+GROUP_PING_COUNT = 5
+
+async def send_group_pings(channel, content, count=GROUP_PING_COUNT):
+    """
+    Отправляет сообщения-пинги группы через очередь исходящих запросов
+
+    Returns:
+        Список успешно отправленных сообщений (ошибки отдельных отправок логируются)
+
+    Raises:
+        Exception: Если не удалось отправить ни одного сообщения
+    """
+    dispatcher = Dispatcher.get_instance()
+    route = Dispatcher.channel_route(channel)
+    results = await asyncio.gather(*(
+        dispatcher.submit(route, channel.send, content, priority=Dispatcher.PRIORITY_BULK)
+        for _ in range(count)
+    ), return_exceptions=True)
+
+    messages = [result for result in results if not isinstance(result, BaseException)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for error in errors:
+        logger.error(f"Ошибка при отправке сообщения группы в канал {channel.id}: {error}", exc_info=error)
+
+    if errors and not messages:
+        raise errors[0]
+    return messages
+
 class GroupTimeModal(ui.Modal, title="Время группы"):
     """Модальное окно для ввода времени группы"""
     
@@ -53,17 +84,16 @@ class GroupTimeModal(ui.Modal, title="Время группы"):
             # Генерируем уникальный ID для группы сообщений
             group_id = str(uuid.uuid4())
             
-            # Получаем экземпляр базы данных
-            db = GroupDatabase.get_instance()
+            # Получаем менеджер групп (сохраняет сообщения и планирует их удаление)
+            group_manager = GroupManager.get_instance()
             
-            # Создаем 5 сообщений для группы
-            for _ in range(5):
-                message = await interaction.channel.send(f"{role_mention} Групп {self.group_type} {time_str}")
+            # Создаем 5 сообщений для группы через очередь исходящих запросов
+            messages = await send_group_pings(interaction.channel, f"{role_mention} Групп {self.group_type} {time_str}")
+            for message in messages:
                 # Сохраняем сообщение в базу данных
-                db.save_message(
+                await group_manager.register_message(
                     group_id=group_id,
-                    message_id=message.id,
-                    channel_id=interaction.channel_id,
+                    message=message,
                     message_type=self.group_type,
                     creator_id=interaction.user.id,
                     minutes_to_delete=5
@@ -76,8 +106,6 @@ class GroupTimeModal(ui.Modal, title="Время группы"):
             )
             
             # Логируем событие
-            from group.manager import GroupManager
-            group_manager = GroupManager.get_instance()
             await group_manager.log_group_creation(
                 interaction.user,
                 self.group_type,
@@ -139,21 +167,20 @@ class CustomGroupModal(ui.Modal, title="Создание собственног
             # Генерируем уникальный ID для группы сообщений
             group_id = str(uuid.uuid4())
             
-            # Получаем экземпляр базы данных
-            db = GroupDatabase.get_instance()
+            # Получаем менеджер групп (сохраняет сообщения и планирует их удаление)
+            group_manager = GroupManager.get_instance()
+            
+            # Создаем 5 сообщений для группы через очередь исходящих запросов
+            message_content = f"{role_mention} {mp_name}"
+            if time_str:
+                message_content += f" {time_str}"
             
-            # Создаем 5 сообщений для группы
-            for _ in range(5):
-                message_content = f"{role_mention} {mp_name}"
-                if time_str:
-                    message_content += f" {time_str}"
-                    
-                message = await interaction.channel.send(message_content)
+            messages = await send_group_pings(interaction.channel, message_content)
+            for message in messages:
                 # Сохраняем сообщение в базу данных
-                db.save_message(
+                await group_manager.register_message(
                     group_id=group_id,
-                    message_id=message.id,
-                    channel_id=interaction.channel_id,
+                    message=message,
                     message_type=mp_name,
                     creator_id=interaction.user.id,
                     minutes_to_delete=5
@@ -171,8 +198,6 @@ class CustomGroupModal(ui.Modal, title="Создание собственног
             )
             
             # Логируем событие
-            from group.manager import GroupManager
-            group_manager = GroupManager.get_instance()
             await group_manager.log_group_creation(
                 interaction.user,
                 mp_name,
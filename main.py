@@ -4,12 +4,14 @@ import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
-from tools.message_sender import MessageSender
 from tools.logger import Logger
+from tools.boot import BootSequence
 from tools.reaction_handlers import handle_reaction_button
 from database.user import UserManager
-from group import GroupManager, handle_group_button
-from database.group import GroupDatabase
+from database.async_db import AsyncDatabase
+from capt.write_buffer import CaptWriteBuffer
+from capt.ranks import RankResolver
+from group import handle_group_button
 
 logger = Logger.get_instance()
 
@@ -27,70 +29,50 @@ intents.message_content = True
 intents.messages = True
 intents.guilds = True
 intents.members = True
-bot = commands.Bot(command_prefix='.', intents=intents)
+
+class ReportBot(commands.Bot):
+    """Бот с однократной последовательностью запуска"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.boot = BootSequence(self, {
+            "report": MAIN_CHANNEL_ID,
+            "order": ORDER_CHANNEL,
+            "afk": AFK_CHANNEL,
+            "promotion": PROMOTION_CHANNEL,
+            "group": int(os.getenv('GROUP_CHANNEL_ID', 0)),
+        })
+
+    async def setup_hook(self):
+        # Выполняется один раз до подключения к шлюзу
+        await self.boot.setup()
+
+bot = ReportBot(command_prefix='.', intents=intents)
 
 @bot.event
 async def on_ready():
     logger.info(f'Бот {bot.user} запущен и готов к работе!')
 
-    try:
-        # Загрузка команд
-        await bot.load_extension("capt.command")
-        logger.info("Команды успешно загружены")
-
-        from capt.view import CaptView
-        bot.add_view(CaptView(None))
-
-        try:
-            synced = await bot.tree.sync()
-            logger.info(f"Синхронизировано {len(synced)} команд")
-        except Exception as e:
-            logger.error(f"Ошибка при синхронизации команд: {e}", exc_info=True)
-            
-        # Синхронизация базы данных пользователей
-        for guild in bot.guilds:
-            user_manager = UserManager.get_instance()
-            added, updated = user_manager.sync_guild_members(guild)
-            logger.info(f"Синхронизация пользователей сервера {guild.name}: добавлено {added}, обновлено {updated}")
-            
-            # Вывод всех пользователей и их статиков для тестирования
-            #all_users = user_manager.get_all_users()
-            #logger.info(f"Всего пользователей в базе: {len(all_users)}")
-            #logger.info("=== СПИСОК ПОЛЬЗОВАТЕЛЕЙ И ИХ СТАТИКОВ ===")
-            #for user in all_users:
-                #user_display_name = user['display_name']
-                #user_static = user['game_static'] if user['game_static'] else "Статик не определен"
-                #logger.info(f"Пользователь: {user_display_name} | Статик: {user_static}")
-            #logger.info("=== КОНЕЦ СПИСКА ===")
-
-        # Инициализация менеджеров
-        group_manager = GroupManager.get_instance()
-
-        # Настройка менеджеров с ботом
-        group_manager.setup(bot)
-
-        channel_report = bot.get_channel(MAIN_CHANNEL_ID)
-        channel_order = bot.get_channel(ORDER_CHANNEL)
-        channel_afk = bot.get_channel(AFK_CHANNEL)
-        channel_promotion = bot.get_channel(PROMOTION_CHANNEL)
-        channel_group = bot.get_channel(int(os.getenv('GROUP_CHANNEL_ID', 0)))
-
-        message_sender = MessageSender(bot)
-        await message_sender.send_report_embed(channel_report)
-        await message_sender.send_order_embed(channel_order)
-        await message_sender.send_afk_embed(channel_afk)
-        await message_sender.send_promotion_embed(channel_promotion)
-        await message_sender.send_group_embed(channel_group)
+    # При переподключении выполняется только сверка, полный запуск — в setup_hook
+    await bot.boot.on_ready()
 
+@bot.command(name="sync")
+@commands.has_permissions(administrator=True)
+async def sync_commands(ctx):
+    """Принудительная синхронизация слэш-команд (только для администраторов)"""
+    try:
+        synced = await bot.boot.sync_commands(force=True)
+        await ctx.reply(f"Синхронизировано {synced} команд")
     except Exception as e:
-        logger.error(f"Ошибка при отправке сообщения: {e}", exc_info=True)
+        logger.error(f"Ошибка при принудительной синхронизации команд: {e}", exc_info=True)
+        await ctx.reply("Не удалось синхронизировать команды")
 
 @bot.event
 async def on_member_join(member):
     """Обработчик события входа пользователя на сервер"""
     try:
         user_manager = UserManager.get_instance()
-        user_manager.update_user(member.id, member.display_name)
+        await AsyncDatabase.get_instance().write(user_manager.update_user, member.id, member.display_name)
         logger.info(f"Пользователь {member.display_name} (ID: {member.id}) присоединился к серверу")
     except Exception as e:
         logger.error(f"Ошибка при обработке входа пользователя: {e}", exc_info=True)
@@ -99,9 +81,11 @@ async def on_member_join(member):
 async def on_member_remove(member):
     """Обработчик события выхода пользователя с сервера"""
     try:
+        RankResolver.get_instance().invalidate(member.id)
+
         # Удаляем пользователя из базы данных
         user_manager = UserManager.get_instance()
-        deleted = user_manager.delete_user(member.id)
+        deleted = await AsyncDatabase.get_instance().write(user_manager.delete_user, member.id)
         if deleted:
             logger.info(f"Пользователь {member.display_name} (ID: {member.id}) удален из базы данных при выходе с сервера")
         else:
@@ -115,14 +99,24 @@ async def on_member_remove(member):
 async def on_member_update(before, after):
     """Обработчик события обновления участника сервера"""
     try:
+        # При изменении ролей сбрасываем кэшированный ранг участника
+        if before.roles != after.roles:
+            RankResolver.get_instance().invalidate(after.id)
+
         # Проверяем, изменилось ли отображаемое имя
         if before.display_name != after.display_name:
             user_manager = UserManager.get_instance()
-            user_manager.update_user(after.id, after.display_name)
+            await AsyncDatabase.get_instance().write(user_manager.update_user, after.id, after.display_name)
             logger.info(f"Пользователь изменил отображаемое имя: {before.display_name} -> {after.display_name} (ID: {after.id})")
     except Exception as e:
         logger.error(f"Ошибка при обработке обновления участника сервера: {e}", exc_info=True)
 
+@bot.event
+async def on_guild_role_delete(role):
+    """Обработчик события удаления роли сервера"""
+    # Удаление роли не вызывает on_member_update, поэтому сбрасываем все ранги
+    RankResolver.get_instance().clear()
+
 @bot.event
 async def on_interaction(interaction: discord.Interaction):
     """Обработчик взаимодействий с ботом"""
@@ -147,4 +141,9 @@ if __name__ == "__main__":
     try:
         bot.run(TOKEN)
     except Exception as e:
-        logger.critical(f"Не удалось запустить бота: {e}", exc_info=True)
\ No newline at end of file
+        logger.critical(f"Не удалось запустить бота: {e}", exc_info=True)
+    finally:
+        # Сохраняем изменения сборов, еще не записанные из буфера
+        CaptWriteBuffer.get_instance().flush_pending()
+        # Дожидаемся завершения операций с базой данных и закрываем соединения
+        AsyncDatabase.get_instance().shutdown()
\ No newline at end of file
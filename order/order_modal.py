@@ -84,11 +84,15 @@ class OrderModal(discord.ui.Modal):
             if self.needs_custom_amount:
                 order_data['amount'] = self.amount.value
 
+            # ID и стоимость заказа сохраняются вместе с заявкой
+            order_data['order_id'] = OrderUtils.generate_order_id(interaction.user.id)
+            order_data['order_price'] = OrderUtils.get_order_price(self.order_type_value, order_data.get('amount'))
+
             logger.info(f"Получен новый запрос от {interaction.user.name} ({interaction.user.id}): {self.order_type_label}")
 
             # Извлекаем все статики из текста и ищем пользователей
             statics = OrderUtils.extract_statics(self.game_statics.value)
-            found_users = OrderUtils.find_users(statics, interaction.guild)
+            found_users = await OrderUtils.find_users(statics, interaction.guild)
 
             # Форматируем список пользователей для отображения
             default_value = f"❓ `{self.game_statics.value}` → Пользователь не найден"
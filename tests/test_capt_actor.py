@@ -0,0 +1,48 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from database.connection import ConnectionPool
+
+class CaptActorStressTest(unittest.TestCase):
+    """Одновременные нажатия кнопок сборов через apply_capt_command (уменьшенный прогон)"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Модули бота при импорте открывают базу данных по относительному пути
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.tmp.name)
+
+        from benchmarks import capt_actor_stress
+        from capt.actor import CaptActors
+        from capt.repository import CaptRepository
+        cls.stress = capt_actor_stress
+        cls.singletons = (CaptActors, CaptRepository)
+
+    @classmethod
+    def tearDownClass(cls):
+        ConnectionPool.close_all_pools()
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def run_stress(self, **overrides):
+        args = dict(capts=3, users=40, slots=8, clicks=400, seed=1)
+        args.update(overrides)
+        return asyncio.run(self.stress.run(SimpleNamespace(**args)))
+
+    def test_invariants_hold(self):
+        self.assertEqual(self.run_stress(), 0)
+
+    def test_invariants_hold_with_few_slots(self):
+        self.assertEqual(self.run_stress(seed=7, slots=3), 0)
+
+    def test_singletons_are_restored(self):
+        previous = [cls._instance for cls in self.singletons]
+        self.run_stress(clicks=50)
+        self.assertEqual([cls._instance for cls in self.singletons], previous)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from database import storage as storage_module
+from database.storage import Storage, MIGRATIONS
+from database.connection import ConnectionPool
+
+class LegacyImportTest(unittest.TestCase):
+    """Перенос данных из старых файлов баз данных в единое хранилище"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # Пути старых баз данных относительные (database/*.db)
+        os.chdir(self.tmp.name)
+        os.makedirs("database")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _create_legacy_capts(self):
+        conn = sqlite3.connect("database/capt.db")
+        conn.executescript('''
+            CREATE TABLE capts (
+                message_id TEXT PRIMARY KEY, name TEXT, creator_id TEXT, creator_name TEXT,
+                datetime TEXT, slots INTEGER, guild_id TEXT, channel_id TEXT, thread_id TEXT
+            );
+            CREATE TABLE participants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, message_id TEXT, user_id TEXT,
+                user_name TEXT, is_extra BOOLEAN
+            );
+            INSERT INTO capts VALUES ('100', 'Сбор', '1', 'creator', '01.01.2030 10:00', 2, '5', '6', '');
+            INSERT INTO participants (message_id, user_id, user_name, is_extra) VALUES ('100', '11', 'a', 0);
+            INSERT INTO participants (message_id, user_id, user_name, is_extra) VALUES ('100', '12', 'b', 1);
+            -- Участники сбора, которого нет в таблице capts
+            INSERT INTO participants (message_id, user_id, user_name, is_extra) VALUES ('200', '13', 'c', 0);
+            INSERT INTO participants (message_id, user_id, user_name, is_extra) VALUES ('200', '14', 'd', 1);
+        ''')
+        conn.commit()
+        conn.close()
+
+    def test_orphan_participants_are_skipped(self):
+        self._create_legacy_capts()
+
+        storage = Storage(os.path.join(self.tmp.name, "database", "bot.db"))
+        conn = storage.pool.get_connection()
+
+        self.assertEqual(storage.get_version(), MIGRATIONS[-1][0])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM capts").fetchone()[0], 1)
+        rows = conn.execute("SELECT message_id, user_id FROM participants ORDER BY user_id").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [('100', '11'), ('100', '12')])
+
+        # Колонки поздних миграций присутствуют
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(participants)")}
+        self.assertTrue({'position', 'rank', 'joined_at'} <= columns)
+        self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+        storage.pool.close_all()
+
+class MigrationFailureTest(unittest.TestCase):
+    """Сбой миграции откатывает ее целиком и останавливает запуск"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.db_file = os.path.join(self.tmp.name, "database", "bot.db")
+
+    def tearDown(self):
+        ConnectionPool.close_all_pools()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_failed_migration_is_rolled_back(self):
+        Storage(self.db_file).pool.close_all()
+        version = MIGRATIONS[-1][0] + 1
+
+        def broken_migration(conn):
+            conn.execute("ALTER TABLE participants ADD COLUMN note TEXT")
+            conn.execute("INSERT INTO missing_table VALUES (1)")
+
+        def fixed_migration(conn):
+            conn.execute("ALTER TABLE participants ADD COLUMN note TEXT")
+
+        broken = MIGRATIONS + [(version, "Сбойная миграция", broken_migration)]
+        with mock.patch.object(storage_module, 'MIGRATIONS', broken):
+            with self.assertLogs('bot', level='CRITICAL') as logs:
+                with self.assertRaises(sqlite3.OperationalError):
+                    Storage(self.db_file)
+
+        # В лог попадает исходная ошибка SQLite с трассировкой
+        self.assertIn("missing_table", logs.output[0])
+        self.assertIsNotNone(logs.records[0].exc_info)
+
+        # Добавленная колонка откатилась вместе с миграцией
+        conn = sqlite3.connect(self.db_file)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(participants)")}
+        applied = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+        conn.close()
+        self.assertNotIn('note', columns)
+        self.assertEqual(applied, MIGRATIONS[-1][0])
+
+        # Исправленная миграция применяется при следующем запуске без ошибки дублирования колонки
+        fixed = MIGRATIONS + [(version, "Исправленная миграция", fixed_migration)]
+        with mock.patch.object(storage_module, 'MIGRATIONS', fixed):
+            storage = Storage(self.db_file)
+        self.assertEqual(storage.get_version(), version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+from tools.logger import Logger
+from tools.message_sender import MessageSender
+from database.user import UserManager
+from database.async_db import AsyncDatabase
+from database.meta import MetaDatabase
+from group import GroupManager
+
+logger = Logger.get_instance()
+
+# Ключ хэша последнего синхронизированного дерева команд
+COMMAND_TREE_HASH_KEY = "command_tree_hash"
+
+class BootSequence:
+    """
+    Однократная последовательность запуска бота.
+    Этапы, не требующие кэша Discord, выполняются в setup_hook до подключения
+    к шлюзу; этапы, которым нужны гильдии и участники, запускаются один раз после
+    первого on_ready и выполняются параллельно. Для каждого этапа в лог пишется
+    время выполнения. Повторные on_ready (переподключения) выполняют только
+    дешевую сверку участников.
+    """
+
+    def __init__(self, bot, panel_channels):
+        """
+        Args:
+            bot: Бот Discord
+            panel_channels: Словарь {имя панели: ID канала}
+        """
+        self.bot = bot
+        self.panel_channels = panel_channels
+        self.booted = False
+        self._ready_task = None
+
+    async def _stage(self, name, coro):
+        """Выполняет этап запуска, логируя время выполнения и ошибки"""
+        started = time.perf_counter()
+        try:
+            result = await coro
+            logger.info(f"Этап запуска '{name}' выполнен за {time.perf_counter() - started:.3f} с")
+            return result
+        except Exception as e:
+            logger.error(f"Ошибка на этапе запуска '{name}' ({time.perf_counter() - started:.3f} с): {e}", exc_info=True)
+            return None
+
+    async def setup(self):
+        """Этапы до подключения к шлюзу (вызывается из setup_hook)"""
+        if self._ready_task is not None:
+            return
+
+        started = time.perf_counter()
+
+        await self._stage("загрузка команд", self.load_extensions())
+        await self._stage("синхронизация команд", self.sync_commands())
+        await self._stage("планировщик групп", self.start_group_manager())
+
+        logger.info(f"Подготовка к подключению завершена за {time.perf_counter() - started:.3f} с")
+
+        # Этапы, которым нужен кэш гильдий, выполняются после первого on_ready
+        self._ready_task = asyncio.create_task(self.after_ready())
+
+    async def after_ready(self):
+        """Параллельные этапы после заполнения кэша гильдий"""
+        await self.bot.wait_until_ready()
+        started = time.perf_counter()
+
+        await asyncio.gather(
+            self._stage("синхронизация участников", self.sync_members()),
+            self._stage("восстановление сборов", self.restore_capts()),
+            self._stage("публикация панелей", self.publish_panels()),
+        )
+
+        self.booted = True
+        logger.info(f"Запуск бота завершен за {time.perf_counter() - started:.3f} с")
+
+    async def on_ready(self):
+        """Сверка состояния при повторных on_ready (после переподключения)"""
+        if not self.booted:
+            return
+
+        await self._stage("сверка участников после переподключения", self.sync_members())
+
+    async def load_extensions(self):
+        """Загружает расширения и регистрирует постоянные view"""
+        await self.bot.load_extension("capt.command")
+
+        from capt.view import CaptView
+        self.bot.add_view(CaptView())
+
+    def command_tree_hash(self):
+        """
+        Вычисляет хэш сериализованного дерева слэш-команд
+
+        Returns:
+            Шестнадцатеричная строка SHA-256
+        """
+        tree = self.bot.tree
+        payload = []
+        for command in tree.get_commands():
+            try:
+                payload.append(command.to_dict(tree))
+            except TypeError:
+                # Старые версии discord.py не принимают дерево в to_dict()
+                payload.append(command.to_dict())
+
+        payload.sort(key=lambda item: item['name'])
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    async def sync_commands(self, force=False):
+        """
+        Синхронизирует дерево слэш-команд, если оно изменилось с прошлой синхронизации
+
+        Args:
+            force: Синхронизировать независимо от хэша (также FORCE_COMMAND_SYNC=1)
+
+        Returns:
+            Количество синхронизированных команд или None, если синхронизация пропущена
+        """
+        force = force or os.getenv('FORCE_COMMAND_SYNC', '0') == '1'
+        async_db = AsyncDatabase.get_instance()
+        meta_db = MetaDatabase.get_instance()
+
+        tree_hash = self.command_tree_hash()
+        if not force and await async_db.read(meta_db.get_value, COMMAND_TREE_HASH_KEY) == tree_hash:
+            logger.info("Дерево команд не изменилось, синхронизация пропущена")
+            return None
+
+        synced = await self.bot.tree.sync()
+        await async_db.write(meta_db.set_value, COMMAND_TREE_HASH_KEY, tree_hash)
+        logger.info(f"Синхронизировано {len(synced)} команд")
+        return len(synced)
+
+    async def start_group_manager(self):
+        """Запускает менеджер групп (планировщик удаления сообщений)"""
+        GroupManager.get_instance().setup(self.bot)
+
+    async def sync_members(self):
+        """Синхронизирует базу данных пользователей со всеми серверами одним снимком"""
+        async_db = AsyncDatabase.get_instance()
+        user_manager = UserManager.get_instance()
+
+        members, complete = UserManager.snapshot_guilds(self.bot.guilds)
+        added, updated, removed, elapsed = await async_db.write(user_manager.sync_members, members, complete)
+        logger.info(
+            f"Синхронизация пользователей серверов ({len(self.bot.guilds)}): добавлено {added}, обновлено {updated}, "
+            f"удалено {removed} за {elapsed:.3f} с"
+        )
+
+    async def restore_capts(self):
+        """Восстанавливает активные сборы и их кнопки"""
+        command_cog = self.bot.get_cog("CaptCommand")
+        if command_cog:
+            await command_cog.sync_views()
+
+    async def publish_panels(self):
+        """Публикует панели с кнопками параллельно"""
+        message_sender = MessageSender(self.bot)
+        publishers = {
+            "report": message_sender.send_report_embed,
+            "order": message_sender.send_order_embed,
+            "afk": message_sender.send_afk_embed,
+            "promotion": message_sender.send_promotion_embed,
+            "group": message_sender.send_group_embed,
+        }
+
+        names = [name for name in publishers if name in self.panel_channels]
+        results = await asyncio.gather(
+            *(publishers[name](self.bot.get_channel(self.panel_channels[name])) for name in names),
+            return_exceptions=True
+        )
+
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка при публикации панели {name}: {result}", exc_info=result)
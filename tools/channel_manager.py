@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from tools.logger import Logger
 from tools.reaction_handlers import ReactionView
 from database.db_manager import DatabaseManager
+from database.async_db import AsyncDatabase
 
 logger = Logger.get_instance()
 db_manager = DatabaseManager.get_instance()
@@ -127,15 +128,34 @@ class ChannelManager:
             # Получаем упоминания ролей для отправки сообщения
             role_mentions = self.get_role_mentions(role_ids)
 
-            # Отправляем сообщение с эмбедом и кнопками
-            message = await channel.send(content=role_mentions, embed=embed)
-            
-            # Создаем представление с кнопками и добавляем к сообщению
-            reaction_view = ReactionView(message, user)
-            await message.edit(view=reaction_view)
+            # Создаем представление с кнопками и отправляем его вместе с эмбедом
+            reaction_view = ReactionView(None, user)
+            message = await channel.send(content=role_mentions, embed=embed, view=reaction_view)
+            reaction_view.message = message
             
             logger.info(f"Отправлено сообщение с '{channel_type}' в канал {channel.name}")
 
+            # Сохраняем заявку и регистрируем кнопки, чтобы при нажатии находить её одним запросом
+            async_db = AsyncDatabase.get_instance()
+            submission_id = await async_db.write(
+                db_manager.add_submission,
+                message.id,
+                channel.id,
+                channel_type,
+                user.id,
+                data
+            )
+            await async_db.write(
+                db_manager.add_reaction_buttons,
+                message.id,
+                channel.id,
+                channel_type,
+                reaction_view.approve_id,
+                reaction_view.reject_id,
+                user.id,
+                submission_id
+            )
+
             return channel
 
         except Exception as e:
@@ -0,0 +1,261 @@
+import os
+import time
+import asyncio
+import functools
+import itertools
+
+import discord
+from tools.logger import Logger
+
+logger = Logger.get_instance()
+
+class RouteBucket:
+    """
+    Ограничитель частоты запросов для одного маршрута (канала, ЛС, гильдии).
+    Работает по принципу «ведра с токенами»: не больше rate запросов за per секунд.
+    """
+
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        """Пополняет токены пропорционально прошедшему времени"""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate / self.per)
+        self.updated_at = now
+
+    def is_idle(self):
+        """Ведро полностью пополнено: оно не отличается от нового и может быть удалено"""
+        self._refill()
+        return self.tokens >= self.rate
+
+    def try_acquire(self):
+        """
+        Забирает токен, если он доступен, не ожидая
+
+        Returns:
+            0, если токен получен, иначе время в секундах до появления токена
+        """
+        self._refill()
+        if self.tokens < 1:
+            return (1 - self.tokens) * self.per / self.rate
+        self.tokens -= 1
+        return 0
+
+class Dispatcher:
+    """
+    Центральная очередь исходящих запросов к Discord.
+    Запросы выполняются пулом обработчиков в порядке приоритета: уведомления,
+    затем логи, затем массовые операции. Ответы на взаимодействия в очередь
+    не ставятся: у них свой лимит и срок ответа в 3 секунды.
+    Частота запросов ограничивается отдельно для каждого маршрута: запрос,
+    маршрут которого исчерпал лимит, откладывается и возвращается в очередь,
+    когда появится токен, не занимая обработчик. Глубина очереди по
+    приоритетам доступна через get_metrics().
+    """
+
+    PRIORITY_NOTIFICATION = 0
+    PRIORITY_LOG = 1
+    PRIORITY_BULK = 2
+
+    # Количество ограничителей маршрутов, при котором удаляются простаивающие
+    BUCKET_SWEEP_THRESHOLD = 256
+
+    PRIORITY_NAMES = {
+        PRIORITY_NOTIFICATION: "notification",
+        PRIORITY_LOG: "log",
+        PRIORITY_BULK: "bulk",
+    }
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Получение единственного экземпляра класса (Singleton)"""
+        if cls._instance is None:
+            cls._instance = Dispatcher()
+        return cls._instance
+
+    def __init__(self, workers=None, route_rate=None, route_per=None):
+        """
+        Инициализация
+
+        Args:
+            workers: Количество обработчиков очереди (по умолчанию из DISPATCHER_WORKERS или 4)
+            route_rate: Количество запросов на маршрут за период (по умолчанию из DISPATCHER_ROUTE_RATE или 5)
+            route_per: Длительность периода в секундах (по умолчанию из DISPATCHER_ROUTE_PER или 5)
+        """
+        self.worker_count = workers or int(os.getenv('DISPATCHER_WORKERS', 4))
+        self.route_rate = route_rate or int(os.getenv('DISPATCHER_ROUTE_RATE', 5))
+        self.route_per = route_per or float(os.getenv('DISPATCHER_ROUTE_PER', 5))
+        # Порог глубины очереди, при превышении которого пишется предупреждение
+        self.depth_warning = int(os.getenv('DISPATCHER_DEPTH_WARNING', 50))
+
+        self._queue = None
+        self._workers = []
+        self._sequence = itertools.count()
+        self._buckets = {}
+        self._bucket_sweep_at = self.BUCKET_SWEEP_THRESHOLD
+
+        # Метрики
+        self._depth = {priority: 0 for priority in self.PRIORITY_NAMES}
+        self._max_depth = 0
+        self._in_flight = 0
+        self._deferred = 0
+        self._completed = 0
+        self._failed = 0
+        self._throttled = 0
+        self._rate_limited = 0
+
+    @staticmethod
+    def channel_route(channel):
+        """Маршрут для сообщений канала или треда"""
+        return f"channel:{channel.id}"
+
+    @staticmethod
+    def dm_route(user):
+        """Маршрут для личных сообщений пользователю"""
+        return f"dm:{user.id}"
+
+    @staticmethod
+    def guild_route(guild, action):
+        """Маршрут для действий на уровне гильдии (например, удаления каналов)"""
+        return f"guild:{guild.id}:{action}"
+
+    def _ensure_started(self):
+        """Запускает обработчики очереди в текущем цикле событий"""
+        if self._workers:
+            return
+
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"dispatcher-{index}")
+            for index in range(self.worker_count)
+        ]
+        logger.info(f"Очередь исходящих запросов запущена (обработчиков: {self.worker_count})")
+
+    def _get_bucket(self, route):
+        """Возвращает ограничитель частоты для маршрута"""
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            if len(self._buckets) >= self._bucket_sweep_at:
+                self._evict_idle_buckets()
+            bucket = RouteBucket(self.route_rate, self.route_per)
+            self._buckets[route] = bucket
+        return bucket
+
+    def _evict_idle_buckets(self):
+        """
+        Удаляет ограничители маршрутов с полным запасом токенов (каналы и ЛС,
+        в которые давно не было запросов), чтобы словарь не рос бесконечно.
+        Следующая очистка выполняется, когда количество ограничителей удвоится.
+        """
+        idle = [route for route, bucket in self._buckets.items() if bucket.is_idle()]
+        for route in idle:
+            del self._buckets[route]
+        self._bucket_sweep_at = max(self.BUCKET_SWEEP_THRESHOLD, 2 * len(self._buckets))
+
+    async def submit(self, route, func, *args, priority=PRIORITY_NOTIFICATION, **kwargs):
+        """
+        Ставит запрос в очередь и дожидается его выполнения
+
+        Args:
+            route: Маршрут запроса (см. channel_route, dm_route, guild_route)
+            func: Асинхронная функция, выполняющая запрос
+            *args, **kwargs: Аргументы функции
+            priority: Приоритет запроса (PRIORITY_*)
+
+        Returns:
+            Результат выполнения функции (исключения передаются вызывающему коду)
+        """
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        call = functools.partial(func, *args, **kwargs)
+        self._enqueue((priority, next(self._sequence), route, call, future))
+
+        depth = self.queue_depth()
+        self._max_depth = max(self._max_depth, depth)
+        if depth == self.depth_warning:
+            logger.warning(f"Очередь исходящих запросов достигла {depth} элементов: {self.get_metrics()['queued']}")
+
+        return await future
+
+    def _enqueue(self, item):
+        """Ставит элемент в очередь (с сохранением исходного порядка)"""
+        self._queue.put_nowait(item)
+        self._depth[item[0]] += 1
+
+    def _requeue(self, item):
+        """Возвращает отложенный запрос в очередь"""
+        self._deferred -= 1
+        self._enqueue(item)
+
+    async def _worker(self):
+        """Обработчик очереди: выполняет запросы по приоритету с учетом ограничений маршрутов"""
+        while True:
+            item = await self._queue.get()
+            priority, _, route, call, future = item
+            self._depth[priority] -= 1
+
+            try:
+                if future.done():
+                    continue
+
+                # Маршрут исчерпал лимит: откладываем запрос, не занимая обработчик,
+                # чтобы запросы других маршрутов и более высокого приоритета не ждали
+                delay = self._get_bucket(route).try_acquire()
+                if delay:
+                    self._throttled += 1
+                    self._deferred += 1
+                    asyncio.get_running_loop().call_later(delay, self._requeue, item)
+                    continue
+
+                self._in_flight += 1
+                try:
+                    result = await call()
+                    if not future.done():
+                        future.set_result(result)
+                    self._completed += 1
+                except Exception as e:
+                    if isinstance(e, discord.HTTPException) and e.status == 429:
+                        self._rate_limited += 1
+                    self._failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self._in_flight -= 1
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике очереди исходящих запросов: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def queue_depth(self):
+        """Возвращает общее количество запросов, ожидающих выполнения"""
+        return sum(self._depth.values())
+
+    def get_metrics(self):
+        """
+        Возвращает метрики очереди
+
+        Returns:
+            Словарь с глубиной очереди по приоритетам и счетчиками выполнения
+        """
+        return {
+            'queued': {self.PRIORITY_NAMES[priority]: depth for priority, depth in self._depth.items()},
+            'max_depth': self._max_depth,
+            'in_flight': self._in_flight,
+            'deferred': self._deferred,
+            'completed': self._completed,
+            'failed': self._failed,
+            'throttled': self._throttled,
+            'rate_limited': self._rate_limited,
+            'routes': len(self._buckets),
+        }
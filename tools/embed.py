@@ -52,7 +52,7 @@ class EmbedBuilder:
         # Поле с типом и ценой
         embed.add_field(
             name="💰 Информация",
-            value=f"**Тип:** {order_type_label}\n**Стоимость:** {OrderUtils.get_order_price(order_type_value, custom_amount)}",
+            value=f"**Тип:** {order_type_label}\n**Стоимость:** {order_data.get('order_price') or OrderUtils.get_order_price(order_type_value, custom_amount)}",
             inline=False
         )
         
@@ -73,7 +73,7 @@ class EmbedBuilder:
         )
         
         # Устанавливаем футер с ID заказа и временем
-        order_id = OrderUtils.generate_order_id(user.id)
+        order_id = order_data.get('order_id') or OrderUtils.generate_order_id(user.id)
         embed.set_footer(text=f"ID заказа: {order_id} • {current_time}")
         
         # Добавляем уменьшенный аватар пользователя
@@ -328,11 +328,11 @@ class EmbedBuilder:
         Args:
             capt_data: Словарь с данными о сборе
                 - name: Название сбора
-                - creator: Пользователь, создавший сбор
+                - creator: Создатель сбора (ParticipantRecord)
                 - datetime: Дата и время проведения
                 - slots: Количество слотов
-                - participants: Список участников
-                - extra_participants: Список дополнительных участников
+                - participants: Участники основного списка (Roster из ParticipantRecord)
+                - extra_participants: Участники дополнительного списка (Roster из ParticipantRecord)
         """
         embed = discord.Embed(
             title=f"{capt_data['name']}", 
@@ -3,6 +3,7 @@ import discord
 from dotenv import load_dotenv
 from tools.logger import Logger
 from tools.embed import EmbedBuilder
+from tools.dispatcher import Dispatcher
 
 load_dotenv()
 
@@ -13,7 +14,7 @@ class LogManager:
 
     @staticmethod
     async def send_decision_log(channel, content_type, status, color, user, moderator, 
-                              original_embed=None, reason=None, order_id=None, order_price=None):
+                              original_embed=None, reason=None, order_id=None, order_price=None, submission=None):
         """
         Отправка информации о решении в лог-канал
         
@@ -28,10 +29,15 @@ class LogManager:
             reason: Причина отказа (если заявка отклонена)
             order_id: ID заказа (для запросов)
             order_price: Цена заказа (для запросов)
+            submission: Запись заявки из базы данных (ID и цена заказа берутся из неё)
         """
         if not channel:
             logger.warning(f"Лог-канал не найден")
             return
+
+        if submission:
+            order_id = order_id or submission.get('order_id')
+            order_price = order_price or submission.get('order_price')
             
         embed = discord.Embed(
             title=f"{content_type.capitalize()} {status}",
@@ -64,7 +70,12 @@ class LogManager:
             embed.add_field(name="Причина отказа", value=reason, inline=False)
         
         try:
-            await channel.send(embed=embed)
+            await Dispatcher.get_instance().submit(
+                Dispatcher.channel_route(channel),
+                channel.send,
+                embed=embed,
+                priority=Dispatcher.PRIORITY_LOG
+            )
             logger.info(f"Отправлено сообщение в лог-канал о {status} {content_type}")
         except Exception as e:
             logger.error(f"Ошибка при отправке сообщения в лог-канал: {e}", exc_info=True) 
\ No newline at end of file
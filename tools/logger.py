@@ -83,14 +83,15 @@ class Logger:
         """
         self.logger.debug(message)
 
-    def critical(self, message):
+    def critical(self, message, exc_info=False):
         """
         Логирование критической ошибки
 
         Args:
             message: Сообщение для записи в лог
+            exc_info: Логировать информацию об исключении
         """
-        self.logger.critical(message)
+        self.logger.critical(message, exc_info=exc_info)
 
     @classmethod
     def get_instance(cls, name="bot", log_dir="logs"):
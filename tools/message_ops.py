@@ -0,0 +1,75 @@
+import discord
+from tools.logger import Logger
+
+logger = Logger.get_instance()
+
+class MessageOps:
+    """
+    Операции с сообщениями по их ID.
+    Работают через частичные сообщения (PartialMessage), поэтому не требуют
+    предварительного запроса сообщения у Discord. Все методы одинаково
+    обрабатывают отсутствие сообщения.
+
+    Возвращаемое значение методов:
+        True — операция выполнена
+        False — сообщение не найдено (удалено)
+        None — другая ошибка (нет прав, ошибка API)
+    """
+
+    @staticmethod
+    def get_partial(channel, message_id) -> discord.PartialMessage:
+        """Возвращает частичное сообщение канала по его ID"""
+        return channel.get_partial_message(int(message_id))
+
+    @staticmethod
+    async def _run(action, channel, message_id, operation):
+        """Выполняет операцию с сообщением и обрабатывает ошибки"""
+        try:
+            await operation
+            return True
+        except discord.NotFound:
+            logger.warning(f"Сообщение {message_id} в канале {channel.id} не найдено ({action})")
+            return False
+        except discord.Forbidden:
+            logger.warning(f"Недостаточно прав для операции '{action}' с сообщением {message_id} в канале {channel.id}")
+            return None
+        except discord.HTTPException as e:
+            logger.error(f"Ошибка при операции '{action}' с сообщением {message_id}: {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    async def edit(channel, message_id, **fields):
+        """
+        Редактирует сообщение по ID
+
+        Args:
+            channel: Канал или тред с сообщением
+            message_id: ID сообщения
+            **fields: Изменяемые поля (content, embed, view и т.д.)
+        """
+        partial = MessageOps.get_partial(channel, message_id)
+        return await MessageOps._run("редактирование", channel, message_id, partial.edit(**fields))
+
+    @staticmethod
+    async def delete(channel, message_id):
+        """
+        Удаляет сообщение по ID
+
+        Args:
+            channel: Канал или тред с сообщением
+            message_id: ID сообщения
+        """
+        partial = MessageOps.get_partial(channel, message_id)
+        return await MessageOps._run("удаление", channel, message_id, partial.delete())
+
+    @staticmethod
+    async def pin(channel, message_id):
+        """
+        Закрепляет сообщение по ID
+
+        Args:
+            channel: Канал или тред с сообщением
+            message_id: ID сообщения
+        """
+        partial = MessageOps.get_partial(channel, message_id)
+        return await MessageOps._run("закрепление", channel, message_id, partial.pin())
@@ -1,5 +1,10 @@
+import os
 import discord
 from tools.logger import Logger
+from tools.message_ops import MessageOps
+from database.panel import PanelDatabase
+from database.async_db import AsyncDatabase
+from tools.dispatcher import Dispatcher
 from tools.view import FeedbackView, OrderView, AfkView, PromotionView
 from tools.embed import EmbedBuilder
 from group.view import GroupView
@@ -9,19 +14,78 @@ logger = Logger.get_instance()
 class MessageSender:
     """Класс для отправки сообщений и эмбедов в каналы Discord"""
 
+    # Количество последних сообщений канала панели, проверяемых при очистке
+    PANEL_PURGE_LIMIT = int(os.getenv('PANEL_PURGE_LIMIT', 100))
+
     def __init__(self, bot: discord.Client):
         self.bot = bot
 
-    async def clear_channel(self, channel: discord.TextChannel):
-        """Очищает канал от сообщений"""
+    async def clear_channel(self, channel: discord.TextChannel, keep_message_id=None):
+        """
+        Очищает канал от лишних сообщений массовым удалением
+
+        Args:
+            channel: Текстовый канал
+            keep_message_id: ID сообщения, которое нужно сохранить (панель)
+        """
         try:
             if isinstance(channel, discord.TextChannel):
-                async for message in channel.history(limit=None):
-                    await message.delete()
-                logger.info(f"Сообщения в канале {channel.name} очищены")
+                deleted = await channel.purge(
+                    limit=self.PANEL_PURGE_LIMIT,
+                    check=lambda message: message.id != keep_message_id,
+                    bulk=True
+                )
+                if deleted:
+                    logger.info(f"Из канала {channel.name} удалено {len(deleted)} лишних сообщений")
         except Exception as e:
             logger.error(f"Ошибка при очистке канала: {e}", exc_info=True)
 
+    async def publish_panel(self, name, channel, embed, view, purge=True):
+        """
+        Публикует панель с кнопками: если панель уже опубликована, редактирует ее
+        сообщение на месте, иначе отправляет новое и сохраняет его ID
+
+        Args:
+            name: Имя панели
+            channel: Канал панели
+            embed: Эмбед панели
+            view: View с кнопками
+            purge: Удалять ли остальные сообщения канала
+
+        Returns:
+            Кортеж (ID сообщения панели или None, была ли панель создана заново)
+        """
+        if channel is None:
+            logger.warning(f"Канал для панели {name} не найден")
+            return None, False
+
+        panel_db = PanelDatabase.get_instance()
+        async_db = AsyncDatabase.get_instance()
+
+        message_id = None
+        panel = await async_db.read(panel_db.get_panel, name)
+        if panel and panel['channel_id'] == channel.id:
+            # Редактирование заново привязывает view к сообщению после перезапуска
+            edited = await MessageOps.edit(channel, panel['message_id'], embed=embed, view=view)
+            if edited is None:
+                return None, False
+            if edited:
+                message_id = panel['message_id']
+                logger.info(f"Панель {name} обновлена на месте (ID: {message_id})")
+
+        created = message_id is None
+        if created:
+            message = await self.send_embed(channel, embed, view)
+            if not message:
+                return None, False
+            message_id = message.id
+            await async_db.write(panel_db.save_panel, name, channel.id, message_id)
+
+        if purge:
+            await self.clear_channel(channel, keep_message_id=message_id)
+
+        return message_id, created
+
     async def send_embed(self, channel: discord.abc.Messageable, embed: discord.Embed, view=None):
         """Отправляет эмбед в указанный канал с опциональным view"""
         try:
@@ -54,7 +118,12 @@ class MessageSender:
                     # Пытаемся получить тред
                     thread = interaction.channel.get_thread(capt_data['thread_id'])
                     if thread:
-                        await thread.send(message)
+                        await Dispatcher.get_instance().submit(
+                            Dispatcher.channel_route(thread),
+                            thread.send,
+                            message,
+                            priority=Dispatcher.PRIORITY_NOTIFICATION
+                        )
                         return
                 
                 logger.warning(f"Тред {capt_data['thread_id']} не найден для сбора {capt_data.get('name', 'Без имени')}")
@@ -62,59 +131,52 @@ class MessageSender:
                 logger.error(f"Ошибка при отправке сообщения в тред: {e}", exc_info=True)
 
     async def send_report_embed(self, channel: discord.abc.Messageable):
-        """Отправляет эмбед с кнопками обратной связи"""
-        # Сначала очищаем канал, если это текстовый канал
-        if isinstance(channel, discord.TextChannel):
-            await self.clear_channel(channel)
-
+        """Публикует эмбед с кнопками обратной связи"""
         # Создаем эмбед с помощью EmbedBuilder
         embed = EmbedBuilder.create_feedback_embed()
 
-        # Создаем view и отправляем эмбед
         view = FeedbackView(self.bot)
-        return await self.send_embed(channel, embed, view)
+        message_id, _ = await self.publish_panel("report", channel, embed, view)
+        return message_id
 
     async def send_order_embed(self, channel: discord.abc.Messageable):
-        """Отправляет эмбед с кнопкой запроса"""
-        if isinstance(channel, discord.TextChannel):
-            await self.clear_channel(channel)
-
+        """Публикует эмбед с кнопкой запроса"""
         # Создаем эмбед с помощью EmbedBuilder
         embed = EmbedBuilder.create_order_button_embed()
 
         view = OrderView(self.bot)
-        return await self.send_embed(channel, embed, view)
+        message_id, _ = await self.publish_panel("order", channel, embed, view)
+        return message_id
 
     async def send_afk_embed(self, channel: discord.abc.Messageable):
-        """Отправляет эмбед с кнопкой отметки АФК"""
-        if isinstance(channel, discord.TextChannel):
-            await self.clear_channel(channel)
-
+        """Публикует эмбед с кнопкой отметки АФК"""
         embed = EmbedBuilder.create_afk_button_embed()
 
         view = AfkView()
-        return await self.send_embed(channel, embed, view)
+        message_id, _ = await self.publish_panel("afk", channel, embed, view)
+        return message_id
 
     async def send_promotion_embed(self, channel: discord.abc.Messageable):
-        """Отправляет эмбед с кнопкой повышения"""
-        if isinstance(channel, discord.TextChannel):
-            await self.clear_channel(channel)
-
+        """Публикует эмбед с кнопкой повышения"""
         # Создаем эмбед для повышения
         embed = EmbedBuilder.create_promotion_button_embed()
 
         view = PromotionView(self.bot)
-        return await self.send_embed(channel, embed, view)
+        message_id, _ = await self.publish_panel("promotion", channel, embed, view)
+        return message_id
 
     async def send_group_embed(self, channel: discord.abc.Messageable):
-        """Отправляет эмбед с кнопками для создания групп"""
-        # Проверяем, есть ли уже закрепленные сообщения с кнопками
-        if isinstance(channel, discord.TextChannel):
+        """Публикует закрепленный эмбед с кнопками для создания групп"""
+        # Если панель еще не сохранена, используем уже закрепленное сообщение с кнопками
+        panel_db = PanelDatabase.get_instance()
+        async_db = AsyncDatabase.get_instance()
+        if isinstance(channel, discord.TextChannel) and not await async_db.read(panel_db.get_panel, "group"):
             pins = await channel.pins()
             for pin in pins:
                 if pin.author == self.bot.user and len(pin.components) > 0:
-                    logger.info(f"Сообщение с кнопками для групп уже существует (ID: {pin.id})")
-                    return pin
+                    logger.info(f"Найдено закрепленное сообщение с кнопками для групп (ID: {pin.id})")
+                    await async_db.write(panel_db.save_panel, "group", channel.id, pin.id)
+                    break
         
         # Создаем эмбед
         embed = discord.Embed(
@@ -132,16 +194,14 @@ class MessageSender:
         # Создаем view с кнопками
         view = GroupView()
         
-        # Отправляем сообщение
-        message = await self.send_embed(channel, embed, view)
+        # Канал групп не очищаем: в нем находятся сообщения активных групп
+        message_id, created = await self.publish_panel("group", channel, embed, view, purge=False)
         
-        # Закрепляем сообщение
-        if message and isinstance(channel, discord.TextChannel):
-            try:
-                await message.pin()
-                logger.info(f"Сообщение с кнопками для групп создано и закреплено (ID: {message.id})")
-            except discord.HTTPException as e:
-                logger.warning(f"Не удалось закрепить сообщение с кнопками для групп: {e}")
-                logger.info(f"Сообщение с кнопками для групп создано (ID: {message.id}), но не закреплено")
+        # Закрепляем новое сообщение
+        if created and isinstance(channel, discord.TextChannel):
+            if await MessageOps.pin(channel, message_id):
+                logger.info(f"Сообщение с кнопками для групп создано и закреплено (ID: {message_id})")
+            else:
+                logger.info(f"Сообщение с кнопками для групп создано (ID: {message_id}), но не закреплено")
         
-        return message 
\ No newline at end of file
+        return message_id
@@ -1,5 +1,6 @@
 import discord
 from tools.logger import Logger
+from tools.dispatcher import Dispatcher
 
 logger = Logger.get_instance()
 
@@ -20,7 +21,13 @@ class NotificationManager:
             bool: True если сообщение отправлено успешно, False в случае ошибки
         """
         try:
-            await user.send(content=content, embed=embed)
+            await Dispatcher.get_instance().submit(
+                Dispatcher.dm_route(user),
+                user.send,
+                content=content,
+                embed=embed,
+                priority=Dispatcher.PRIORITY_NOTIFICATION
+            )
             logger.info(f"Отправлено уведомление в ЛС пользователю {user.name} ({user.id})")
             return True
         except discord.Forbidden:
@@ -1,6 +1,8 @@
 import re
 from datetime import datetime
 from database.user import UserManager
+from database.async_db import AsyncDatabase
+from database.member_index import MemberIndex
 
 class OrderUtils:
     """Вспомогательные функции для работы с заказами"""
@@ -26,7 +28,7 @@ class OrderUtils:
         return words
     
     @staticmethod
-    def find_users(statics, guild):
+    async def find_users(statics, guild):
         """
         Ищет пользователей по списку статиков
         
@@ -37,16 +39,32 @@ class OrderUtils:
         Returns:
             Словарь {статик: пользователь или None}
         """
-        user_manager = UserManager.get_instance()
         found_users = {}
         
+        # Сначала ищем в индексе участников в памяти, база данных - запасной вариант
+        user_ids_by_static = {}
+        index = MemberIndex.get_instance()
+        if index.loaded:
+            user_ids_by_static = {
+                static: [record.id for record in records]
+                for static, records in index.find_by_statics(statics).items()
+                if records
+            }
+
+        # Статики, не найденные в индексе, ищем в базе данных одним запросом
+        missing_statics = [static for static in statics if static not in user_ids_by_static]
+        if missing_statics:
+            user_manager = UserManager.get_instance()
+            users_by_static = await AsyncDatabase.get_instance().read(user_manager.get_users_by_game_statics, missing_statics)
+            for static, users in users_by_static.items():
+                if users:
+                    user_ids_by_static[static] = [user['id'] for user in users]
+        
         for static in statics:
-            # Пробуем найти пользователя по точному совпадению
-            users = user_manager.get_user_by_game_static(static)
-            if users and len(users) > 0:
+            user_ids = user_ids_by_static.get(static)
+            if user_ids:
                 # Попытаемся найти пользователя на сервере
-                user_id = users[0]['id']
-                member = guild.get_member(user_id)
+                member = guild.get_member(user_ids[0])
                 if member:
                     found_users[static] = member
                 else:
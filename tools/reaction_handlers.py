@@ -7,9 +7,11 @@ from dotenv import load_dotenv
 
 from tools.logger import Logger
 from database.db_manager import DatabaseManager
+from database.async_db import AsyncDatabase
 from tools.notification_manager import NotificationManager
 from tools.log_manager import LogManager
 from tools.embed import EmbedBuilder
+from tools.dispatcher import Dispatcher
 
 load_dotenv()
 
@@ -35,6 +37,8 @@ class ReactionView(discord.ui.View):
         self.user = user
         
         approve_id, reject_id = create_reaction_buttons()
+        self.approve_id = approve_id
+        self.reject_id = reject_id
         
         approve_button = discord.ui.Button(
             style=discord.ButtonStyle.success,
@@ -53,6 +57,140 @@ class ReactionView(discord.ui.View):
         self.add_item(approve_button)
         self.add_item(reject_button)
 
+# Статусы решений с учетом рода типа заявки
+APPROVED_STATUSES = {
+    "жалоба": "одобрена",
+    "предложение": "одобрено",
+    "запрос": "одобрен",
+    "повышение": "одобрено"
+}
+REJECTED_STATUSES = {
+    "жалоба": "отклонена",
+    "предложение": "отклонено",
+    "запрос": "отклонен",
+    "повышение": "отклонено"
+}
+
+def get_content_type(channel, submission=None):
+    """
+    Определение типа заявки
+    
+    Args:
+        channel: Канал заявки
+        submission: Запись заявки из базы данных (если есть)
+        
+    Returns:
+        Тип заявки (жалоба/предложение/запрос/повышение/заявка)
+    """
+    if submission:
+        return submission['type']
+
+    # Заявка создана до сохранения в базе данных, определяем тип по имени канала
+    channel_name = channel.name.lower()
+    for content_type in ("жалоба", "предложение", "запрос", "повышение"):
+        if content_type in channel_name:
+            return content_type
+
+    return "заявка"
+
+def get_log_channel_id(content_type):
+    """Возвращает ID лог-канала для типа заявки или None, если лог не ведется"""
+    if content_type == "жалоба":
+        return REPORT_LOG_CHANNEL
+    elif content_type == "предложение":
+        return SUGGESTION_LOG_CHANNEL
+    elif content_type == "запрос":
+        return ORDER_LOG_CHANNEL
+    elif content_type == "повышение" and os.getenv('PROMOTION_LOG_CHANNEL'):
+        return int(os.getenv('PROMOTION_LOG_CHANNEL'))
+    return None
+
+def parse_order_embed(message):
+    """
+    Извлечение ID и стоимости заказа из эмбеда
+    (для запросов, созданных до сохранения заявок в базе данных)
+    
+    Returns:
+        Кортеж (ID заказа, стоимость)
+    """
+    order_id = None
+    order_price = None
+
+    if message.embeds:
+        # Ищем ID заказа в футере первого эмбеда
+        footer_text = message.embeds[0].footer.text
+        id_match = re.search(r'ID заказа: (ORD-\d+-\d+)', footer_text or '')
+        if id_match:
+            order_id = id_match.group(1)
+
+        # Ищем информацию о цене в полях эмбеда
+        for field in message.embeds[0].fields:
+            if field.name == "💰 Информация":
+                price_match = re.search(r'Стоимость: ([\d.,\- +]+)', field.value)
+                if price_match:
+                    order_price = price_match.group(1)
+                break
+
+    return order_id, order_price
+
+def parse_promotion_embed(message):
+    """
+    Извлечение текущего и следующего ранга из эмбеда
+    (для повышений, созданных до сохранения заявок в базе данных)
+    
+    Returns:
+        Кортеж (текущий ранг, следующий ранг) или (None, None)
+    """
+    if message.embeds and message.embeds[0].fields:
+        # Получаем информацию о повышении из первого поля эмбеда
+        user_field = message.embeds[0].fields[0]
+        if user_field.name == "👤 Пользователь":
+            rank_match = re.search(r'с (\d+) ранга на (\d+) ранг', user_field.value)
+            if rank_match:
+                return int(rank_match.group(1)), int(rank_match.group(2))
+
+    return None, None
+
+async def send_decision_log(interaction, content_type, status, color, user, message, submission=None, reason=None):
+    """Отправка решения по заявке в лог-канал соответствующего типа"""
+    log_channel_id = get_log_channel_id(content_type)
+    if not log_channel_id:
+        return
+
+    log_channel = interaction.guild.get_channel(log_channel_id)
+    if not log_channel:
+        return
+
+    # Для старых запросов без записи в базе данных берем данные заказа из эмбеда
+    order_id = None
+    order_price = None
+    if content_type == "запрос" and submission is None:
+        order_id, order_price = parse_order_embed(message)
+
+    await LogManager.send_decision_log(
+        channel=log_channel,
+        content_type=content_type,
+        status=status,
+        color=color,
+        user=user,
+        moderator=interaction.user,
+        original_embed=message.embeds[0] if message.embeds else None,
+        reason=reason,
+        order_id=order_id,
+        order_price=order_price,
+        submission=submission
+    )
+    logger.info(f"Отправлен лог о решении по заявке '{content_type}' от {user.name} в канал {log_channel.name}")
+
+async def delete_submission_channel(channel, reason):
+    """Удаляет канал заявки через очередь исходящих запросов"""
+    await Dispatcher.get_instance().submit(
+        Dispatcher.guild_route(channel.guild, "channel_delete"),
+        channel.delete,
+        reason=reason,
+        priority=Dispatcher.PRIORITY_BULK
+    )
+
 class RejectReasonModal(discord.ui.Modal, title="Причина отклонения"):
     """Модальное окно для ввода причины отклонения заявки"""
     
@@ -64,31 +202,21 @@ class RejectReasonModal(discord.ui.Modal, title="Причина отклонен
         max_length=1000
     )
     
-    def __init__(self, message, user):
+    def __init__(self, message, user, submission=None):
         super().__init__()
         self.message = message
         self.user = user
+        self.submission = submission
     
     async def on_submit(self, interaction: discord.Interaction):
+        # Сначала отвечаем на взаимодействие, уведомления и логи отправляются после
+        await interaction.response.defer()
+
         channel = self.message.channel
         
-        # Определяем тип содержимого канала на основе его имени
-        channel_name = channel.name.lower()
-        if "жалоба" in channel_name:
-            content_type = "жалоба"
-            status = "отклонена"
-        elif "предложение" in channel_name:
-            content_type = "предложение"
-            status = "отклонено"
-        elif "запрос" in channel_name:
-            content_type = "запрос"
-            status = "отклонен"
-        elif "повышение" in channel_name:
-            content_type = "повышение"
-            status = "отклонено"
-        else:
-            content_type = "заявка"
-            status = "отклонена"
+        # Определяем тип заявки по записи в базе данных
+        content_type = get_content_type(channel, self.submission)
+        status = REJECTED_STATUSES.get(content_type, "отклонена")
         
         # Создаем эмбед для уведомления пользователя
         embed = EmbedBuilder.create_decision_embed(
@@ -105,72 +233,38 @@ class RejectReasonModal(discord.ui.Modal, title="Причина отклонен
             embed
         )
 
-        # Отправляем сообщение в лог-канал, если это жалоба или запрос
+        # Отправляем сообщение в лог-канал
         try:
-            if content_type == "жалоба" and REPORT_LOG_CHANNEL:
-                log_channel = interaction.guild.get_channel(REPORT_LOG_CHANNEL)
-                if log_channel:
-                    await LogManager.send_decision_log(
-                        channel=log_channel,
-                        content_type=content_type,
-                        status=status,
-                        color=discord.Color.red(),
-                        user=self.user,
-                        moderator=interaction.user,
-                        reason=self.reason.value,
-                        original_embed=self.message.embeds[0] if self.message.embeds else None
-                    )
-                    logger.info(f"Отправлен лог об отклонении жалобы от {self.user.name} в канал {log_channel.name}")
-            elif content_type == "предложение" and SUGGESTION_LOG_CHANNEL:
-                log_channel = interaction.guild.get_channel(SUGGESTION_LOG_CHANNEL)
-                if log_channel:
-                    await LogManager.send_decision_log(
-                        channel=log_channel,
-                        content_type=content_type,
-                        status=status,
-                        color=discord.Color.red(),
-                        user=self.user,
-                        moderator=interaction.user,
-                        reason=self.reason.value,
-                        original_embed=self.message.embeds[0] if self.message.embeds else None
-                    )
-                    logger.info(f"Отправлен лог об отклонении предложения от {self.user.name} в канал {log_channel.name}")
-            elif content_type == "запрос" and ORDER_LOG_CHANNEL:
-                log_channel = interaction.guild.get_channel(ORDER_LOG_CHANNEL)
-                if log_channel:
-                    await LogManager.send_decision_log(
-                        channel=log_channel,
-                        content_type=content_type,
-                        status=status,
-                        color=discord.Color.red(),
-                        user=self.user,
-                        moderator=interaction.user,
-                        reason=self.reason.value,
-                        original_embed=self.message.embeds[0] if self.message.embeds else None
-                    )
-            elif content_type == "повышение" and os.getenv('PROMOTION_LOG_CHANNEL'):
-                promotion_log_channel_id = int(os.getenv('PROMOTION_LOG_CHANNEL'))
-                log_channel = interaction.guild.get_channel(promotion_log_channel_id)
-                if log_channel:
-                    await LogManager.send_decision_log(
-                        channel=log_channel,
-                        content_type=content_type,
-                        status=status,
-                        color=discord.Color.red(),
-                        user=self.user,
-                        moderator=interaction.user,
-                        reason=self.reason.value,
-                        original_embed=self.message.embeds[0] if self.message.embeds else None
-                    )
+            await send_decision_log(
+                interaction,
+                content_type=content_type,
+                status=status,
+                color=discord.Color.red(),
+                user=self.user,
+                message=self.message,
+                submission=self.submission,
+                reason=self.reason.value
+            )
         except Exception as e:
             logger.error(f"Ошибка при отправке лога решения: {e}", exc_info=True)
 
-        # Используем defer() вместо отправки сообщения
-        await interaction.response.defer()
+        # Сохраняем решение по заявке
+        if self.submission:
+            await AsyncDatabase.get_instance().write(
+                db_manager.set_submission_decision,
+                self.submission['id'],
+                "rejected",
+                interaction.user.id,
+                self.reason.value
+            )
 
         try:
-            await channel.delete(reason=f"{content_type.capitalize()} отклонена модератором {interaction.user.name}")
+            await delete_submission_channel(
+                channel,
+                reason=f"{content_type.capitalize()} отклонена модератором {interaction.user.name}"
+            )
             logger.info(f"Канал {channel.name} удален после отклонения {content_type}")
+            await AsyncDatabase.get_instance().write(db_manager.delete_reaction_buttons, self.message.id, channel.id)
         except Exception as e:
             logger.error(f"Ошибка при удалении канала {channel.name}: {e}", exc_info=True)
             # Если не удалось удалить канал, отправляем сообщение
@@ -179,7 +273,7 @@ class RejectReasonModal(discord.ui.Modal, title="Причина отклонен
             except:
                 pass
 
-async def handle_approve(bot, interaction, message, user):
+async def handle_approve(bot, interaction, message, user, submission=None):
     """
     Обработка нажатия на кнопку "Одобрить"
     
@@ -188,62 +282,27 @@ async def handle_approve(bot, interaction, message, user):
         interaction: Объект взаимодействия
         message: Сообщение с кнопками
         user: Пользователь, оставивший заявку
+        submission: Запись заявки из базы данных (если есть)
         
     Returns:
         None
     """
+    # Сначала отвечаем на взаимодействие, уведомления и логи отправляются после
+    await interaction.response.defer()
+
     channel = message.channel
     
-    # Определяем тип содержимого на основе имени канала
-    channel_name = channel.name.lower()
-    if "жалоба" in channel_name:
-        content_type = "жалоба"
-        status = "одобрена"
-    elif "предложение" in channel_name:
-        content_type = "предложение"
-        status = "одобрено"
-    elif "запрос" in channel_name:
-        content_type = "запрос"
-        status = "одобрен"
-    elif "повышение" in channel_name:
-        content_type = "повышение"
-        status = "одобрено"
-    else:
-        content_type = "заявка"
-        status = "одобрена"
-    
-    # Если это запрос, пытаемся получить ID заказа
-    order_id = None
-    if content_type == "запрос" and message.embeds:
-        # Ищем ID заказа в футере первого эмбеда
-        footer_text = message.embeds[0].footer.text
-        id_match = re.search(r'ID заказа: (ORD-\d+-\d+)', footer_text)
-        if id_match:
-            order_id = id_match.group(1)
-    
-    # Если это заказ, получаем информацию о цене
-    order_price = None
-    if content_type == "запрос" and message.embeds:
-        # Ищем информацию о цене в полях эмбеда
-        for field in message.embeds[0].fields:
-            if field.name == "💰 Информация":
-                price_match = re.search(r'Стоимость: ([\d.,\- +]+)', field.value)
-                if price_match:
-                    order_price = price_match.group(1)
-                break
+    # Определяем тип заявки по записи в базе данных
+    content_type = get_content_type(channel, submission)
+    status = APPROVED_STATUSES.get(content_type, "одобрена")
                 
     # Если это повышение, выдаем роль следующего ранга
-    if content_type == "повышение" and message.embeds:
+    if content_type == "повышение":
         try:
-            next_rank = None
-            # Получаем информацию о повышении из первого поля эмбеда
-            if message.embeds[0].fields:
-                user_field = message.embeds[0].fields[0]
-                if user_field.name == "👤 Пользователь":
-                    rank_match = re.search(r'с (\d+) ранга на (\d+) ранг', user_field.value)
-                    if rank_match:
-                        current_rank = int(rank_match.group(1))
-                        next_rank = int(rank_match.group(2))
+            if submission:
+                current_rank, next_rank = submission['current_rank'], submission['next_rank']
+            else:
+                current_rank, next_rank = parse_promotion_embed(message)
                         
             if next_rank:
                 # Получаем ID роли для нового ранга
@@ -263,7 +322,7 @@ async def handle_approve(bot, interaction, message, user):
                             logger.info(f"Роль {rank_role.name} успешно выдана пользователю {user.name} при повышении с {current_rank} до {next_rank} ранга")
                             
                             # Удаляем предыдущую роль ранга, если она есть
-                            if current_rank > 0:
+                            if current_rank and current_rank > 0:
                                 prev_rank_role_id = int(os.getenv(f'RANK_{current_rank}', 0))
                                 if prev_rank_role_id:
                                     prev_rank_role = interaction.guild.get_role(prev_rank_role_id)
@@ -293,68 +352,36 @@ async def handle_approve(bot, interaction, message, user):
         embed
     )
 
-    # Отправляем сообщение в лог-канал, если это жалоба, запрос или повышение
+    # Отправляем сообщение в лог-канал
     try:
-        if content_type == "жалоба" and REPORT_LOG_CHANNEL:
-            log_channel = interaction.guild.get_channel(REPORT_LOG_CHANNEL)
-            if log_channel:
-                await LogManager.send_decision_log(
-                    channel=log_channel,
-                    content_type=content_type,
-                    status=status,
-                    color=discord.Color.green(),
-                    user=user,
-                    moderator=interaction.user,
-                    original_embed=message.embeds[0] if message.embeds else None
-                )
-        elif content_type == "предложение" and SUGGESTION_LOG_CHANNEL:
-            log_channel = interaction.guild.get_channel(SUGGESTION_LOG_CHANNEL)
-            if log_channel:
-                await LogManager.send_decision_log(
-                    channel=log_channel,
-                    content_type=content_type,
-                    status=status,
-                    color=discord.Color.green(),
-                    user=user,
-                    moderator=interaction.user,
-                    original_embed=message.embeds[0] if message.embeds else None
-                )
-        elif content_type == "запрос" and ORDER_LOG_CHANNEL:
-            log_channel = interaction.guild.get_channel(ORDER_LOG_CHANNEL)
-            if log_channel:
-                await LogManager.send_decision_log(
-                    channel=log_channel,
-                    content_type=content_type,
-                    status=status,
-                    color=discord.Color.green(),
-                    user=user,
-                    moderator=interaction.user,
-                    order_id=order_id,
-                    order_price=order_price,
-                    original_embed=message.embeds[0] if message.embeds else None
-                )
-        elif content_type == "повышение" and os.getenv('PROMOTION_LOG_CHANNEL'):
-            promotion_log_channel_id = int(os.getenv('PROMOTION_LOG_CHANNEL'))
-            log_channel = interaction.guild.get_channel(promotion_log_channel_id)
-            if log_channel:
-                await LogManager.send_decision_log(
-                    channel=log_channel,
-                    content_type=content_type,
-                    status=status,
-                    color=discord.Color.green(),
-                    user=user,
-                    moderator=interaction.user,
-                    original_embed=message.embeds[0] if message.embeds else None
-                )
+        await send_decision_log(
+            interaction,
+            content_type=content_type,
+            status=status,
+            color=discord.Color.green(),
+            user=user,
+            message=message,
+            submission=submission
+        )
     except Exception as e:
         logger.error(f"Ошибка при отправке лога решения: {e}", exc_info=True)
-    
-    # Используем defer() вместо отправки сообщения
-    await interaction.response.defer()
+
+    # Сохраняем решение по заявке
+    if submission:
+        await AsyncDatabase.get_instance().write(
+            db_manager.set_submission_decision,
+            submission['id'],
+            "approved",
+            interaction.user.id
+        )
     
     try:
-        await channel.delete(reason=f"{content_type.capitalize()} одобрена модератором {interaction.user.name}")
+        await delete_submission_channel(
+            channel,
+            reason=f"{content_type.capitalize()} одобрена модератором {interaction.user.name}"
+        )
         logger.info(f"Канал {channel.name} удален после одобрения {content_type}")
+        await AsyncDatabase.get_instance().write(db_manager.delete_reaction_buttons, message.id, channel.id)
     except Exception as e:
         logger.error(f"Ошибка при удалении канала {channel.name}: {e}", exc_info=True)
         # Если не удалось удалить канал, отправляем сообщение
@@ -363,7 +390,7 @@ async def handle_approve(bot, interaction, message, user):
         except:
             pass
 
-async def handle_reject(bot, interaction, message, user):
+async def handle_reject(bot, interaction, message, user, submission=None):
     """
     Обработка нажатия на кнопку "Отклонить"
     
@@ -372,14 +399,70 @@ async def handle_reject(bot, interaction, message, user):
         interaction: Объект взаимодействия
         message: Сообщение с кнопками
         user: Пользователь, оставивший заявку
+        submission: Запись заявки из базы данных (если есть)
         
     Returns:
         None
     """
     # Отправляем модальное окно для ввода причины отклонения
-    modal = RejectReasonModal(message, user)
+    modal = RejectReasonModal(message, user, submission)
     await interaction.response.send_modal(modal)
 
+async def get_user_from_embed(bot, message):
+    """
+    Определение автора заявки по упоминанию в эмбеде
+    (для заявок, созданных до регистрации кнопок в базе данных)
+    
+    Args:
+        bot: Экземпляр бота
+        message: Сообщение с заявкой
+        
+    Returns:
+        Пользователь или None, если его не удалось определить
+    """
+    if not message.embeds:
+        return None
+
+    embed = message.embeds[0]
+    # Ищем поле "От кого" или "Заказчик"
+    for field in embed.fields:
+        if field.name in ["От кого", "👤 Заказчик", "👤 Пользователь"]:
+            # Извлекаем ID пользователя из упоминания
+            user_id_match = re.search(r'<@(\d+)>', field.value)
+            if user_id_match:
+                user_id = int(user_id_match.group(1))
+                try:
+                    return await bot.fetch_user(user_id)
+                except:
+                    logger.warning(f"Не удалось получить пользователя с ID {user_id}")
+
+    return None
+
+async def get_submission_author(bot, interaction, author_id):
+    """
+    Получение автора заявки по ID из кэша, а при его отсутствии - через API
+    
+    Args:
+        bot: Экземпляр бота
+        interaction: Объект взаимодействия с кнопкой
+        author_id: ID автора заявки
+        
+    Returns:
+        Пользователь или None, если его не удалось получить
+    """
+    author_id = int(author_id)
+
+    user = interaction.guild.get_member(author_id) if interaction.guild else None
+    if user is None:
+        user = bot.get_user(author_id)
+    if user is None:
+        try:
+            user = await bot.fetch_user(author_id)
+        except:
+            logger.warning(f"Не удалось получить пользователя с ID {author_id}")
+
+    return user
+
 async def handle_reaction_button(bot, interaction):
     """
     Обработка нажатия на кнопку реакции
@@ -393,60 +476,36 @@ async def handle_reaction_button(bot, interaction):
     """
     custom_id = interaction.data.get('custom_id', '')
     
-    # Получаем канал и сообщение, к которому привязана кнопка
-    channel = interaction.channel
+    # Сообщение, к которому привязана нажатая кнопка, приходит вместе с взаимодействием
+    message = interaction.message
+    if message is None:
+        logger.warning(f"Не удалось найти сообщение с кнопкой {custom_id}")
+        await interaction.response.send_message(
+            "Не удалось найти сообщение с этой кнопкой", 
+            ephemeral=True
+        )
+        return
     
+    # Находим кнопку и ее заявку одним индексированным запросом
     try:
-        # Ищем сообщение в текущем канале, к которому привязан view
-        async for message in channel.history(limit=100):
-            if message.author == bot.user and message.components:
-                # Проверяем, есть ли в компонентах сообщения кнопка с нужным ID
-                for row in message.components:
-                    for item in row.children:
-                        if item.custom_id == custom_id:
-                            # Нашли нужное сообщение с кнопкой
-                            break
-                    else:
-                        continue
-                    break
-                else:
-                    continue
-                break
-        else:
-            logger.warning(f"Не удалось найти сообщение с кнопкой {custom_id}")
-            await interaction.response.send_message(
-                "Не удалось найти сообщение с этой кнопкой", 
-                ephemeral=True
-            )
-            return
+        button_info, submission = await AsyncDatabase.get_instance().read(db_manager.get_button_with_submission, custom_id)
     except Exception as e:
-        logger.error(f"Ошибка при поиске сообщения с кнопкой: {e}", exc_info=True)
+        logger.error(f"Ошибка при поиске заявки по кнопке {custom_id}: {e}", exc_info=True)
         await interaction.response.send_message(
             "Произошла ошибка при обработке кнопки", 
             ephemeral=True
         )
         return
     
-    # Ищем упоминание пользователя в эмбеде
     user = None
-    if message.embeds:
-        embed = message.embeds[0]
-        # Ищем поле "От кого" или "Заказчик"
-        for field in embed.fields:
-            if field.name in ["От кого", "👤 Заказчик", "👤 Пользователь"]:
-                # Извлекаем ID пользователя из упоминания
-                mention = field.value
-                user_id_match = re.search(r'<@(\d+)>', mention)
-                if user_id_match:
-                    user_id = int(user_id_match.group(1))
-                    try:
-                        user = await bot.fetch_user(user_id)
-                        break
-                    except:
-                        logger.warning(f"Не удалось получить пользователя с ID {user_id}")
+    if button_info and button_info['author_id']:
+        user = await get_submission_author(bot, interaction, button_info['author_id'])
+    else:
+        # Заявка создана до регистрации кнопок, ищем автора в эмбеде
+        user = await get_user_from_embed(bot, message)
     
     if not user:
-        logger.warning("Не удалось определить пользователя из эмбеда")
+        logger.warning("Не удалось определить автора заявки")
         await interaction.response.send_message(
             "Не удалось определить автора заявки", 
             ephemeral=True
@@ -455,9 +514,9 @@ async def handle_reaction_button(bot, interaction):
     
     # Обрабатываем нажатие на кнопку
     if custom_id.startswith("approve_"):
-        await handle_approve(bot, interaction, message, user)
+        await handle_approve(bot, interaction, message, user, submission)
     elif custom_id.startswith("reject_"):
-        await handle_reject(bot, interaction, message, user)
+        await handle_reject(bot, interaction, message, user, submission)
     else:
         await interaction.response.send_message(
             "Неизвестный тип кнопки", 